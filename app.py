@@ -1,22 +1,47 @@
-from flask import Flask, request, jsonify, send_file
+import time
+_import_started = time.perf_counter()
+
+from flask import Blueprint, Flask, Response, request, jsonify, send_file, current_app, stream_with_context
 from flask_cors import CORS
 from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
 from datetime import datetime
-from models import db
+from sqlalchemy import and_, or_
+import click
+import csv
+import io
+import json
+from models import db, BankProfile, CompanyProfile, Employee, Payslip
 from config import Config
+from backend.config.db import init_db, pool_status
+from backend.models.transactions import BalanceSnapshot, Transaction
+from backend.routes.documents import documents_bp
+from backend.routes.jobs import jobs_bp
+from backend.routes.settings import settings_bp
+from backend.routes.transactions import transactions_bp
+from backend.utils.employee_import import import_employees
+from backend.utils.metrics import init_metrics, observe, render_prometheus, stage
+from backend.utils.profiling import init_profiling
+from backend.utils.money import currency_exponent, format_money, to_decimal, to_minor
+from backend.utils.pagination import decode_cursor, encode_cursor, page_size
+from backend.utils.query_cache import get_query_cache
+from backend.utils.render_cache import cached_pdf_response
+from backend.utils.settings_cache import get_settings_cache, payslip_branding, statement_branding
+from backend.utils.transaction_ingest import iter_csv_rows, iter_ndjson_rows
 
-app = Flask(__name__)
-CORS(app)
+_imports_ms = round((time.perf_counter() - _import_started) * 1000, 1)
 
-# Load configuration
-app.config.from_object(Config)
-db.init_app(app)
+# Routes that used to live directly on the app; CLI commands stay top-level
+api_bp = Blueprint('api', __name__, cli_group=None)
 
 def generate_payslip_pdf(data):
+    # ReportLab loads on the first render, not at startup
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+    from backend.utils.pdf_styles import footer_timestamp
+
+    generated_at, invariant = footer_timestamp(data)
     buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
+    c = canvas.Canvas(buffer, pagesize=letter, invariant=invariant)
     width, height = letter
 
     # Add company header
@@ -42,28 +67,32 @@ def generate_payslip_pdf(data):
     c.setFont("Helvetica-Bold", 12)
     c.drawString(50, height - 250, "Salary Details")
     c.setFont("Helvetica", 12)
-    basic_salary = float(data.get('basic_salary', 0))
-    allowances = float(data.get('allowances', 0))
-    deductions = float(data.get('deductions', 0))
+    currency = data.get('currency', 'KES')
+    exponent = currency_exponent(currency)
+    basic_salary = to_minor(data.get('basic_salary', 0), exponent)
+    allowances = to_minor(data.get('allowances', 0), exponent)
+    deductions = to_minor(data.get('deductions', 0), exponent)
     
-    c.drawString(50, height - 270, f"Basic Salary: ${basic_salary:,.2f}")
-    c.drawString(50, height - 290, f"Allowances: ${allowances:,.2f}")
-    c.drawString(50, height - 310, f"Deductions: ${deductions:,.2f}")
+    c.drawString(50, height - 270, f"Basic Salary: {format_money(basic_salary, currency, exponent)}")
+    c.drawString(50, height - 290, f"Allowances: {format_money(allowances, currency, exponent)}")
+    c.drawString(50, height - 310, f"Deductions: {format_money(deductions, currency, exponent)}")
     
     # Add total
     c.setFont("Helvetica-Bold", 12)
     net_salary = basic_salary + allowances - deductions
-    c.drawString(50, height - 350, f"Net Salary: ${net_salary:,.2f}")
+    c.drawString(50, height - 350, f"Net Salary: {format_money(net_salary, currency, exponent)}")
     
     # Add footer
     c.setFont("Helvetica-Oblique", 8)
-    c.drawString(50, 50, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    c.drawString(50, 50, f"Generated on: {generated_at.strftime('%Y-%m-%d %H:%M:%S')}")
     
-    c.save()
+    with stage('payslip', 'build'):
+        c.save()
+    observe('payslip_pdf_bytes', buffer.tell(), document='payslip')
     buffer.seek(0)
     return buffer
 
-@app.route('/api/payslip/generate', methods=['POST', 'OPTIONS'])
+@api_bp.route('/api/payslip/generate', methods=['POST', 'OPTIONS'])
 def generate_payslip():
     if request.method == 'OPTIONS':
         # Handle CORS preflight request
@@ -74,24 +103,174 @@ def generate_payslip():
         return response
         
     try:
-        data = request.get_json()
+        with stage('payslip', 'parse'):
+            data = request.get_json()
         print("Received data:", data)  # Debug print
-        
-        # Generate PDF
-        pdf_buffer = generate_payslip_pdf(data)
-        
-        # Return the PDF file
-        return send_file(
-            pdf_buffer,
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f"payslip_{datetime.now().strftime('%Y%m%d')}.pdf"
+        app = current_app._get_current_object()
+        
+        # Generate PDF (or reuse an identical earlier render)
+        return cached_pdf_response(
+            app,
+            'payslip',
+            payslip_branding(app, data),
+            generate_payslip_pdf,
+            f"payslip_{datetime.now().strftime('%Y%m%d')}.pdf"
         )
+    except ValueError as e:
+        # e.g. a salary figure that is not a number
+        return jsonify({'message': str(e)}), 422
     except Exception as e:
         print(f"Error generating payslip: {str(e)}")  # Debug print
         return jsonify({'message': 'An error occurred while generating the payslip'}), 500
 
-@app.route('/generate-bank-statement', methods=['POST'])
+def employee_payslip_fields(employee, salaries):
+    # Employee rows carry identity only; salary figures come from the run request
+    fields = {
+        'employeeName': f"{employee.first_name} {employee.last_name}",
+        'employeeId': str(employee.id),
+        'position': employee.position
+    }
+    fields.update(salaries.get(str(employee.id), {}))
+    return fields
+
+@api_bp.route('/api/payroll/run', methods=['POST'])
+def run_payroll_batch():
+    try:
+        data = request.get_json()
+
+        if not data or not data.get('period'):
+            return jsonify({
+                'message': 'Missing required fields',
+                'fields': ['period']
+            }), 422
+
+        # output: "zip" (one PDF per employee) or "pdf" (one combined document)
+        output = data.get('output', 'zip')
+        if output not in ('zip', 'pdf'):
+            return jsonify({'message': f'Unknown output: {output}'}), 400
+
+        employees = data.get('employees', 'all')
+        if employees == 'all':
+            salaries = data.get('salaries', {})
+            query = Employee.query.order_by(Employee.last_name, Employee.first_name, Employee.id)
+            if data.get('department'):
+                query = query.filter_by(department=data['department'])
+            employees = [employee_payslip_fields(emp, salaries) for emp in query.all()]
+
+        if not employees:
+            return jsonify({'message': 'No employees to pay'}), 400
+
+        defaults = payslip_branding(current_app._get_current_object(), {
+            'company_name': data.get('company_name', 'Company Name'),
+            'company_logo': data.get('company_logo'),
+            'currency': data.get('currency', 'KES')
+        })
+        from backend.utils.payroll_run import run_payroll
+        buffer, stats = run_payroll(
+            employees, data['period'], defaults, current_app.config['PAYROLL_WORKERS'], combined=output == 'pdf'
+        )
+        print(f"Payroll run {stats['period']}: {stats['count']} payslips at {stats['payslips_per_second']}/sec")
+
+        response = send_file(
+            buffer,
+            mimetype='application/pdf' if output == 'pdf' else 'application/zip',
+            as_attachment=True,
+            download_name=f"payroll_{data['period']}.{output}"
+        )
+        response.headers['X-Payslip-Count'] = str(stats['count'])
+        response.headers['X-Payslips-Per-Second'] = str(stats['payslips_per_second'])
+        return response
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 422
+    except Exception as e:
+        print(f"Error running payroll: {str(e)}")
+        return jsonify({'message': 'An error occurred while running payroll'}), 500
+
+@api_bp.cli.command('payroll-run')
+@click.option('--period', required=True, help='Pay period, e.g. 2024-01')
+@click.option('--input', 'input_path', type=click.Path(exists=True),
+              help='JSON file with a list of employees; defaults to every Employee row')
+@click.option('--department', default=None, help='Only employees in this department (without --input)')
+@click.option('--combined', is_flag=True, help='Write one PDF with a page per employee instead of a ZIP')
+@click.option('--output', default=None, help='File to write (default: payroll_<period>.zip, or .pdf with --combined)')
+@click.option('--workers', type=int, default=None, help='Worker processes (default: PAYROLL_WORKERS)')
+@click.option('--currency', default=None, help='Default: the saved settings, else KES')
+@click.option('--company-name', default=None, help='Default: the saved settings')
+def payroll_run_command(period, input_path, department, combined, output, workers, currency, company_name):
+    if input_path:
+        with open(input_path) as f:
+            employees = json.load(f)
+    else:
+        query = Employee.query.order_by(Employee.last_name, Employee.first_name, Employee.id)
+        if department:
+            query = query.filter_by(department=department)
+        employees = [employee_payslip_fields(emp, {}) for emp in query.all()]
+    if not employees:
+        raise click.ClickException('No employees to pay')
+
+    from backend.utils.payroll_run import run_payroll
+    # Saved branding (name, logo, currency) unless overridden on the command line
+    defaults = payslip_branding(current_app._get_current_object(), {})
+    defaults.setdefault('company_name', 'Company Name')
+    defaults.setdefault('currency', 'KES')
+    if company_name:
+        defaults['company_name'] = company_name
+    if currency:
+        defaults['currency'] = currency
+    buffer, stats = run_payroll(
+        employees, period, defaults, workers or current_app.config['PAYROLL_WORKERS'], combined=combined
+    )
+
+    output = output or f"payroll_{period}.{'pdf' if combined else 'zip'}"
+    with open(output, 'wb') as f:
+        f.write(buffer.getvalue())
+    click.echo(f"Wrote {stats['count']} payslips to {output} in {stats['elapsed_seconds']}s "
+               f"({stats['payslips_per_second']} payslips/sec, {stats['workers']} workers)")
+
+@api_bp.cli.command('statements-batch')
+@click.option('--from-date', default=None, help='First day of the period, YYYY-MM-DD')
+@click.option('--to-date', default=None, help='Last day of the period, YYYY-MM-DD')
+@click.option('--output', default=None,
+              help='ZIP file or directory to write (default: bank_statements_<from>_<to>.zip)')
+@click.option('--workers', type=int, default=None, help='Worker processes (default: STATEMENT_BATCH_WORKERS)')
+@click.option('--resume', is_flag=True, help='Continue an interrupted run from its checkpoint')
+def statements_batch_command(from_date, to_date, output, workers, resume):
+    # One statement per account with transactions in the period. A .zip output
+    # is assembled from a <output>.parts directory, which holds the checkpoint
+    # until every statement has rendered.
+    from backend.utils.batch_statements import remove_statements, run_batch_statements, zip_statements
+    output = output or f"bank_statements_{from_date or 'start'}_{to_date or 'end'}.zip"
+    as_zip = output.endswith('.zip')
+    directory = output + '.parts' if as_zip else output
+
+    def progress(checkpoint):
+        click.echo(f"\r{len(checkpoint['done'])}/{checkpoint['total']} statements"
+                   f" ({len(checkpoint['failed'])} failed)", nl=False)
+
+    try:
+        checkpoint = run_batch_statements(
+            db.session, Transaction.__table__, BalanceSnapshot.__table__, directory, from_date, to_date,
+            defaults=statement_branding(current_app._get_current_object(), {}),
+            workers=workers or current_app.config['STATEMENT_BATCH_WORKERS'],
+            resume=resume,
+            progress=progress,
+            batch_size=current_app.config.get('TRANSACTION_BATCH_SIZE', 1000)
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo('')
+
+    if checkpoint['failed']:
+        for account_number, error in checkpoint['failed'].items():
+            click.echo(f"  {account_number}: {error}", err=True)
+        raise click.ClickException(f"{checkpoint['error']} (rerun with --resume; progress is kept in {directory})")
+    if as_zip:
+        zip_statements(directory, output)
+        remove_statements(directory)
+    click.echo(f"Wrote {len(checkpoint['done'])} statements to {output} in {checkpoint['elapsed_seconds']}s "
+               f"({checkpoint['statements_per_second']} statements/sec, {checkpoint['workers']} workers)")
+
+@api_bp.route('/generate-bank-statement', methods=['POST'])
 def create_bank_statement():
     try:
         data = request.json
@@ -149,103 +328,87 @@ def create_bank_statement():
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
-@app.route('/api/payslips/recent', methods=['GET'])
+# Entries shown in each dashboard list
+RECENT_LIMIT = 5
+
+def _recent_payslips():
+    # One joined query, newest first on the created_at index; the employee's
+    # name comes back with the row instead of a lazy load per payslip
+    rows = db.session.query(
+        Payslip.id,
+        Payslip.basic_salary,
+        Payslip.allowances,
+        Payslip.deductions,
+        Payslip.created_at,
+        Employee.first_name,
+        Employee.last_name
+    ).join(
+        Employee, Payslip.employee_id == Employee.id
+    ).order_by(
+        Payslip.created_at.desc(), Payslip.id.desc()
+    ).limit(RECENT_LIMIT).all()
+
+    return [{
+        'id': row.id,
+        'employee_name': f"{row.first_name} {row.last_name}",
+        'amount': float(to_decimal(
+            to_minor(row.basic_salary) + to_minor(row.allowances) - to_minor(row.deductions)
+        )),
+        'created_at': row.created_at.strftime('%Y-%m-%d')
+    } for row in rows]
+
+def _recent_statements():
+    # Month snapshots are the stored per-account statements. The account name
+    # is a correlated lookup served by the transactions (account_number, ...)
+    # index, so this stays a single query however many accounts exist.
+    account_name = db.select(Transaction.account_name).where(
+        Transaction.account_number == BalanceSnapshot.account_number
+    ).limit(1).correlate(BalanceSnapshot).scalar_subquery()
+
+    rows = db.session.query(
+        BalanceSnapshot, account_name.label('account_name')
+    ).order_by(
+        BalanceSnapshot.updated_at.desc(), BalanceSnapshot.id.desc()
+    ).limit(RECENT_LIMIT).all()
+
+    return [{
+        'id': snapshot.id,
+        'account_name': name,
+        'account_number': snapshot.account_number,
+        'statement_date': snapshot.month.strftime('%Y-%m'),
+        'opening_balance': float(snapshot.opening_balance),
+        'closing_balance': float(snapshot.closing_balance),
+        'created_at': snapshot.updated_at.strftime('%Y-%m-%d')
+    } for snapshot, name in rows]
+
+@api_bp.route('/api/payslips/recent', methods=['GET'])
 def get_recent_payslips():
     try:
-        # Get the user's employees
-        employees = Employee.query.all()
-        
-        if not employees:
-            return jsonify({'payslips': []}), 200
-            
-        employee_ids = [emp.id for emp in employees]
-        
-        # Get recent payslips for these employees
-        payslips = Payslip.query.filter(
-            Payslip.employee_id.in_(employee_ids)
-        ).order_by(
-            Payslip.created_at.desc()
-        ).limit(5).all()
-        
-        return jsonify({
-            'payslips': [{
-                'id': p.id,
-                'employee_name': f"{p.employee.first_name} {p.employee.last_name}",
-                'period_start': p.pay_period_start.strftime('%Y-%m-%d'),
-                'period_end': p.pay_period_end.strftime('%Y-%m-%d'),
-                'amount': p.net_pay,
-                'created_at': p.created_at.strftime('%Y-%m-%d')
-            } for p in payslips]
-        }), 200
+        payslips = get_query_cache(current_app).get_or_load('recent_payslips', _recent_payslips)
+        return jsonify({'payslips': payslips}), 200
     except Exception as e:
         print(f"Error fetching recent payslips: {str(e)}")
         return jsonify({'message': 'An error occurred while fetching recent payslips'}), 500
 
-@app.route('/api/statements/recent', methods=['GET'])
+@api_bp.route('/api/statements/recent', methods=['GET'])
 def get_recent_statements():
     try:
-        # Get the user's employees
-        employees = Employee.query.all()
-        
-        if not employees:
-            return jsonify({'statements': []}), 200
-            
-        employee_ids = [emp.id for emp in employees]
-        
-        # Get bank accounts for these employees
-        bank_accounts = BankAccount.query.filter(
-            BankAccount.employee_id.in_(employee_ids)
-        ).all()
-        
-        if not bank_accounts:
-            return jsonify({'statements': []}), 200
-            
-        account_ids = [acc.id for acc in bank_accounts]
-        
-        # Get recent statements for these accounts
-        statements = BankStatement.query.filter(
-            BankStatement.bank_account_id.in_(account_ids)
-        ).order_by(
-            BankStatement.created_at.desc()
-        ).limit(5).all()
-        
-        return jsonify({
-            'statements': [{
-                'id': s.id,
-                'account_number': s.account.account_number,
-                'statement_date': s.statement_date.strftime('%Y-%m-%d'),
-                'opening_balance': s.opening_balance,
-                'closing_balance': s.closing_balance,
-                'created_at': s.created_at.strftime('%Y-%m-%d')
-            } for s in statements]
-        }), 200
+        statements = get_query_cache(current_app).get_or_load('recent_statements', _recent_statements)
+        return jsonify({'statements': statements}), 200
     except Exception as e:
         print(f"Error fetching recent statements: {str(e)}")
         return jsonify({'message': 'An error occurred while fetching recent statements'}), 500
 
-@app.route('/api/profile/company', methods=['GET'])
+@api_bp.route('/api/profile/company', methods=['GET'])
 def get_company_profile():
     try:
-        company = CompanyProfile.query.first()
-        
-        if not company:
-            return jsonify({'profile': None}), 200
-            
-        profile_data = {
-            'name': company.name,
-            'address': company.address,
-            'phone': company.phone,
-            'email': company.email,
-            'website': company.website or '',
-            'logo_url': company.logo_url or ''
-        }
-        
+        _, profile_data = get_settings_cache(current_app).get(CompanyProfile)
         return jsonify({'profile': profile_data}), 200
     except Exception as e:
         print(f"Error in get_company_profile: {str(e)}")
         return jsonify({'message': 'An error occurred while fetching company profile'}), 500
 
-@app.route('/api/profile/company', methods=['POST'])
+@api_bp.route('/api/profile/company', methods=['POST'])
 def setup_company_profile():
     try:
         data = request.get_json()
@@ -286,45 +449,31 @@ def setup_company_profile():
             db.session.add(company)
         
         db.session.commit()
+        get_settings_cache(current_app).invalidate(CompanyProfile)
         
         return jsonify({
             'message': 'Company profile saved successfully',
-            'profile': {
-                'name': company.name,
-                'address': company.address,
-                'phone': company.phone,
-                'email': company.email,
-                'website': company.website or '',
-                'logo_url': company.logo_url or ''
-            }
+            'profile': company.to_dict()
         }), 200
     except Exception as e:
         db.session.rollback()
         print(f"Error in setup_company_profile: {str(e)}")
         return jsonify({'message': 'An error occurred while saving company profile'}), 500
 
-@app.route('/api/profile/bank', methods=['GET'])
+@api_bp.route('/api/profile/bank', methods=['GET'])
 def get_bank_profile():
     try:
-        profile = BankProfile.query.first()
+        _, profile = get_settings_cache(current_app).get(BankProfile)
         
         if not profile:
             return jsonify({'message': 'Bank profile not found'}), 404
             
-        return jsonify({
-            'profile': {
-                'id': profile.id,
-                'bank_name': profile.bank_name,
-                'account_number': profile.account_number,
-                'branch_code': profile.branch_code,
-                'swift_code': profile.swift_code
-            }
-        }), 200
+        return jsonify({'profile': profile}), 200
     except Exception as e:
         print(f"Error fetching bank profile: {str(e)}")
         return jsonify({'message': 'An error occurred while fetching bank profile'}), 500
 
-@app.route('/api/profile/bank', methods=['POST'])
+@api_bp.route('/api/profile/bank', methods=['POST'])
 def setup_bank_profile():
     try:
         data = request.get_json()
@@ -361,44 +510,112 @@ def setup_bank_profile():
             db.session.add(profile)
         
         db.session.commit()
+        get_settings_cache(current_app).invalidate(BankProfile)
         
         return jsonify({
             'message': 'Bank profile saved successfully',
-            'profile': {
-                'id': profile.id,
-                'bank_name': profile.bank_name,
-                'account_number': profile.account_number,
-                'branch_code': profile.branch_code,
-                'swift_code': profile.swift_code
-            }
+            'profile': profile.to_dict()
         }), 200
     except Exception as e:
         print(f"Bank profile error: {str(e)}")
         db.session.rollback()
         return jsonify({'message': 'An error occurred while saving bank profile'}), 500
 
-@app.route('/api/employees', methods=['GET'])
+# Columns /api/employees can return (?fields=id,first_name)
+EMPLOYEE_FIELDS = ('id', 'first_name', 'last_name', 'email', 'phone', 'position', 'department', 'hire_date')
+# Sort keys are non-null so the (value, id) keyset never has to compare NULLs
+EMPLOYEE_SORTS = ('id', 'first_name', 'last_name', 'email', 'position')
+EMPLOYEE_PAGE_SIZE = 50
+# Rows fetched per round trip when exporting
+EMPLOYEE_EXPORT_CHUNK_ROWS = 1000
+
+def _employee_dict(row, fields):
+    result = {}
+    for field in fields:
+        value = getattr(row, field)
+        if field == 'hire_date':
+            value = value.strftime('%Y-%m-%d') if value else None
+        result[field] = value
+    return result
+
+def _prefix_pattern(text):
+    # LIKE 'text%' so the name and email indexes can be range-scanned
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return escaped + '%'
+
+def _filter_employees(query, args):
+    # department / position equality and a name-or-email prefix search (q)
+    for field in ('department', 'position'):
+        if args.get(field):
+            query = query.filter(getattr(Employee, field) == args[field])
+    if args.get('q'):
+        pattern = _prefix_pattern(args['q'])
+        query = query.filter(or_(
+            Employee.first_name.like(pattern, escape='\\'),
+            Employee.last_name.like(pattern, escape='\\'),
+            Employee.email.like(pattern, escape='\\')
+        ))
+    return query
+
+@api_bp.route('/api/employees', methods=['GET'])
 def get_employees():
+    args = request.args
     try:
-        employees = Employee.query.all()
-        
+        fields = [field for field in args.get('fields', '').split(',') if field] or list(EMPLOYEE_FIELDS)
+        unknown = [field for field in fields if field not in EMPLOYEE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+        sort = args.get('sort', 'id')
+        descending = sort.startswith('-')
+        sort = sort.lstrip('-')
+        if sort not in EMPLOYEE_SORTS:
+            raise ValueError(f"Cannot sort by {sort}")
+
+        size = page_size(args.get('limit'), EMPLOYEE_PAGE_SIZE)
+        cursor = decode_cursor(args['cursor']) if args.get('cursor') else None
+        if cursor is not None and len(cursor) != 2:
+            raise ValueError('Invalid cursor')
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
+    try:
+        # Only the requested columns (plus the keyset ones) leave the database
+        sort_column = getattr(Employee, sort)
+        selected = list(dict.fromkeys(fields + ['id', sort]))
+        query = db.session.query(*[getattr(Employee, field) for field in selected])
+
+        query = _filter_employees(query, args)
+
+        # Keyset pagination: continue after the (sort value, id) of the previous page's last row
+        if cursor:
+            last_value, last_id = cursor
+            after_id = Employee.id < last_id if descending else Employee.id > last_id
+            if sort == 'id':
+                query = query.filter(after_id)
+            else:
+                after_value = sort_column < last_value if descending else sort_column > last_value
+                query = query.filter(or_(after_value, and_(sort_column == last_value, after_id)))
+
+        order = [sort_column.desc() if descending else sort_column.asc()]
+        if sort != 'id':
+            order.append(Employee.id.desc() if descending else Employee.id.asc())
+        rows = query.order_by(*order).limit(size + 1).all()
+
+        next_cursor = None
+        if len(rows) > size:
+            rows = rows[:size]
+            next_cursor = encode_cursor([getattr(rows[-1], sort), rows[-1].id])
+
         return jsonify({
-            'employees': [{
-                'id': emp.id,
-                'first_name': emp.first_name,
-                'last_name': emp.last_name,
-                'email': emp.email,
-                'phone': emp.phone,
-                'position': emp.position,
-                'department': emp.department,
-                'hire_date': emp.hire_date.strftime('%Y-%m-%d') if emp.hire_date else None
-            } for emp in employees]
+            'employees': [_employee_dict(row, fields) for row in rows],
+            'next_cursor': next_cursor
         }), 200
     except Exception as e:
         print(f"Error fetching employees: {str(e)}")
         return jsonify({'message': 'An error occurred while fetching employees'}), 500
 
-@app.route('/api/employees', methods=['POST'])
+@api_bp.route('/api/employees', methods=['POST'])
 def create_employee():
     try:
         data = request.get_json()
@@ -451,7 +668,78 @@ def create_employee():
         print(f"Error creating employee: {str(e)}")
         return jsonify({'message': 'An error occurred while creating employee'}), 500
 
-@app.route('/api/employees/<int:id>', methods=['PUT'])
+@api_bp.route('/api/employees/import', methods=['POST'])
+def import_employees_bulk():
+    # CSV (header row of field names) and NDJSON bodies are streamed; a JSON
+    # body takes {"employees": [...]}. ?on_error=skip keeps the valid rows.
+    if request.mimetype == 'text/csv':
+        rows = iter_csv_rows(request.stream)
+    elif request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        rows = iter_ndjson_rows(request.stream)
+    else:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data.get('employees'), list):
+            return jsonify({'message': 'No employees provided'}), 400
+        rows = data['employees']
+
+    skip_invalid = request.args.get('on_error') == 'skip'
+    try:
+        summary, errors = import_employees(
+            db.session,
+            Employee.__table__,
+            rows,
+            current_app.config.get('EMPLOYEE_IMPORT_BATCH_SIZE', 1000),
+            skip_invalid
+        )
+        if errors and not skip_invalid:
+            db.session.rollback()
+            return jsonify({'message': 'Invalid employees', **summary, 'errors': errors}), 422
+
+        db.session.commit()
+        return jsonify({'message': 'Employees imported successfully', **summary, 'errors': errors}), 200
+    except (ValueError, UnicodeDecodeError) as e:
+        # Unparseable NDJSON line or a body that is not UTF-8
+        db.session.rollback()
+        return jsonify({'message': f'Could not read import: {str(e)}'}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error importing employees: {str(e)}")
+        return jsonify({'message': 'An error occurred while importing employees'}), 500
+
+@api_bp.route('/api/employees/export', methods=['GET'])
+def export_employees():
+    # Streams every matching employee (same filters as the listing) as CSV or
+    # NDJSON from a server-side cursor; the CSV re-imports as-is
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'message': f'Unknown format: {export_format}'}), 400
+
+    columns = [getattr(Employee, field) for field in EMPLOYEE_FIELDS]
+    query = _filter_employees(db.session.query(*columns), request.args).order_by(Employee.id)
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == 'csv':
+            writer.writerow(EMPLOYEE_FIELDS)
+        for row in query.yield_per(EMPLOYEE_EXPORT_CHUNK_ROWS):
+            record = _employee_dict(row, EMPLOYEE_FIELDS)
+            if export_format == 'csv':
+                writer.writerow(['' if record[field] is None else record[field] for field in EMPLOYEE_FIELDS])
+            else:
+                buffer.write(json.dumps(record) + '\n')
+            if buffer.tell() >= 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=employees.{export_format}'
+    return response
+
+@api_bp.route('/api/employees/<int:id>', methods=['PUT'])
 def update_employee(id):
     try:
         employee = Employee.query.filter_by(id=id).first()
@@ -506,7 +794,7 @@ def update_employee(id):
         print(f"Error updating employee: {str(e)}")
         return jsonify({'message': 'An error occurred while updating employee'}), 500
 
-@app.route('/api/employees/<int:id>', methods=['DELETE'])
+@api_bp.route('/api/employees/<int:id>', methods=['DELETE'])
 def delete_employee(id):
     try:
         employee = Employee.query.filter_by(id=id).first()
@@ -523,5 +811,74 @@ def delete_employee(id):
         print(f"Error deleting employee: {str(e)}")
         return jsonify({'message': 'An error occurred while deleting employee'}), 500
 
+@api_bp.route('/api/health', methods=['GET'])
+def health():
+    return jsonify({
+        'status': 'ok',
+        'startup': current_app.config['STARTUP_TIMING']
+    }), 200
+
+@api_bp.route('/api/health/db', methods=['GET'])
+def database_health():
+    # Round-trips a trivial query and reports the connection pool's counters
+    started = time.perf_counter()
+    try:
+        db.session.execute(db.text('SELECT 1'))
+        db.session.rollback()
+        status, code = 'ok', 200
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error checking database: {str(e)}")
+        status, code = 'unavailable', 503
+
+    return jsonify({
+        'status': status,
+        'ping_ms': round((time.perf_counter() - started) * 1000, 3),
+        'pool': pool_status(db.engine)
+    }), code
+
+@api_bp.route('/metrics', methods=['GET'])
+def metrics():
+    # Prometheus text exposition; only served when METRICS_ENABLED is set
+    if not current_app.config.get('METRICS_ENABLED'):
+        return jsonify({'message': 'Metrics are disabled'}), 404
+    return current_app.response_class(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+@api_bp.cli.command('init-db')
+def init_db_command():
+    # Schema creation is explicit; the app never runs create_all() on boot
+    db.create_all()
+    click.echo('Database tables created')
+
+def create_app(config_object=Config):
+    # The one app behind app.py, backend/app.py and simple_app.py. ReportLab and
+    # the DB driver are imported on first use, so a fresh worker is ready as soon
+    # as its blueprints are registered.
+    started = time.perf_counter()
+    app = Flask(__name__)
+    CORS(app)
+
+    # Load configuration
+    app.config.from_object(config_object)
+    init_db(app)
+    init_metrics(app)
+    init_profiling(app)
+
+    app.register_blueprint(api_bp)
+    app.register_blueprint(settings_bp)
+    app.register_blueprint(transactions_bp)
+    app.register_blueprint(documents_bp)
+    app.register_blueprint(jobs_bp)
+
+    timing = {
+        'imports_ms': _imports_ms,
+        'create_app_ms': round((time.perf_counter() - started) * 1000, 1)
+    }
+    app.config['STARTUP_TIMING'] = timing
+    print(f"App ready: imports {timing['imports_ms']} ms, create_app {timing['create_app_ms']} ms")
+    return app
+
+# Nothing is built on import: servers call create_app() (or import wsgi.app), so
+# importing this module for its helpers never starts a second app
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
@@ -1,18 +1,11 @@
-from flask import Flask
-from flask_cors import CORS
-from config.db import init_db
-from routes.settings import settings_bp
-from routes.transactions import transactions_bp
+# Kept so existing `python backend/app.py` setups keep working; it now serves the
+# same app as the top-level app.py (run from the repository root, or here).
+import os
+import sys
 
-app = Flask(__name__)
-CORS(app)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Initialize database
-init_db(app)
-
-# Register blueprints
-app.register_blueprint(settings_bp)
-app.register_blueprint(transactions_bp)
+from wsgi import app
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -1,17 +1,153 @@
+from flask import appcontext_pushed
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+import threading
+import time
 
 db = SQLAlchemy()
+_init_lock = threading.Lock()
+
+# Driver-specific name for the connect timeout argument
+CONNECT_TIMEOUT_ARGS = {
+    'mysqlconnector': 'connection_timeout',
+    'pymysql': 'connect_timeout',
+    'mysqldb': 'connect_timeout',
+    'pysqlite': 'timeout'
+}
 
 def init_db(app):
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'mysql://root:@localhost/payslip_db'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    db.init_app(app)
-    Migrate(app, db)
-    
-    # Import models here to ensure they're registered with SQLAlchemy
-    from ..models import settings, transactions, users
-    
-    # Create tables if they don't exist
-    with app.app_context():
-        db.create_all()
+    app.config.setdefault('SQLALCHEMY_DATABASE_URI', 'mysql+mysqlconnector://root:@localhost/payslip_db')
+    app.config.setdefault('SQLALCHEMY_TRACK_MODIFICATIONS', False)
+
+    # Creating the engine imports the DB driver, so it waits for the first app
+    # context (a request, a CLI command, a shell) instead of slowing down boot.
+    # Tables are created with `flask init-db`, never at startup.
+    appcontext_pushed.connect(_ensure_db, app)
+
+def _ensure_db(app, **extra):
+    if 'sqlalchemy' in app.extensions:
+        return
+    with _init_lock:
+        if 'sqlalchemy' in app.extensions:
+            return
+        # Explicit SQLALCHEMY_ENGINE_OPTIONS still win over the DB_POOL_* settings
+        options = engine_options(app.config)
+        options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+        db.init_app(app)
+        try:
+            from flask_migrate import Migrate
+        except ImportError:
+            pass
+        else:
+            Migrate(app, db)
+
+def engine_options(config):
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = {}
+
+    timeout_arg = CONNECT_TIMEOUT_ARGS.get(url.get_driver_name())
+    if timeout_arg and config.get('DB_CONNECT_TIMEOUT'):
+        options['connect_args'] = {timeout_arg: config['DB_CONNECT_TIMEOUT']}
+
+    # In-memory SQLite lives inside a single connection, so it keeps
+    # Flask-SQLAlchemy's static pool and none of the sizing applies
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return options
+
+    options.update({
+        'poolclass': TimedQueuePool,
+        'pool_size': config.get('DB_POOL_SIZE', 5),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', -1),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', False)
+    })
+    return options
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.connects = 0
+        self.invalidated = 0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def on_connect(self, dbapi_connection, record):
+        with self._lock:
+            self.connects += 1
+
+    def on_invalidate(self, dbapi_connection, record, exception):
+        # Stale connections caught by pre-ping or a failed query end up here
+        with self._lock:
+            self.invalidated += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_total_ms': round(self.wait_total * 1000, 3),
+                'wait_avg_ms': round(self.wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+                'connects': self.connects,
+                'invalidated': self.invalidated
+            }
+
+class TimedQueuePool(QueuePool):
+    # QueuePool that records how long each checkout waited for a connection
+    # (including opening a new one) and how often the wait timed out
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        # recreate() hands the existing listeners over through _dispatch
+        if '_dispatch' not in kwargs:
+            event.listen(self, 'connect', self.metrics.on_connect)
+            event.listen(self, 'invalidate', self.metrics.on_invalidate)
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except PoolTimeout:
+            self.metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - started)
+        return entry
+
+def pool_status(engine):
+    # Live counters from the pool plus the cumulative wait metrics, if recorded
+    pool = engine.pool
+    status = {'pool_class': type(pool).__name__}
+    if hasattr(pool, 'checkedout'):
+        status.update({
+            'size': pool.size(),
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': pool.overflow(),
+            'timeout_seconds': pool.timeout()
+        })
+    metrics = getattr(pool, 'metrics', None)
+    if metrics is not None:
+        status.update(metrics.snapshot())
+    return status
@@ -12,10 +12,15 @@ class Settings(db.Model):
     currency = db.Column(db.String(3), default='KES')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped by SQLAlchemy on every UPDATE; the settings cache revalidates on it
+    version = db.Column(db.Integer, nullable=False)
+
+    __mapper_args__ = {'version_id_col': version}
 
     def to_dict(self):
         return {
             'id': self.id,
+            'version': self.version,
             'company_name': self.company_name,
             'company_logo': self.company_logo,
             'bank_name': self.bank_name,
@@ -3,6 +3,10 @@ from datetime import datetime
 
 class Transaction(db.Model):
     __tablename__ = 'transactions'
+    __table_args__ = (
+        # Serves the account + date range filter and the (date, id) keyset order
+        db.Index('ix_transactions_account_date_id', 'account_number', 'date', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     transaction_id = db.Column(db.String(20), unique=True, nullable=False)
@@ -10,9 +14,9 @@ class Transaction(db.Model):
     account_number = db.Column(db.String(50), nullable=False)
     date = db.Column(db.Date, nullable=False)
     description = db.Column(db.String(200))
-    money_in = db.Column(db.Decimal(10, 2), default=0)
-    money_out = db.Column(db.Decimal(10, 2), default=0)
-    balance = db.Column(db.Decimal(10, 2), nullable=False)
+    money_in = db.Column(db.Numeric(10, 2), default=0)
+    money_out = db.Column(db.Numeric(10, 2), default=0)
+    balance = db.Column(db.Numeric(10, 2), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def to_dict(self):
@@ -28,3 +32,33 @@ class Transaction(db.Model):
             'balance': float(self.balance),
             'created_at': self.created_at.isoformat()
         }
+
+class BalanceSnapshot(db.Model):
+    # Month-end position per account, kept up to date on transaction ingest
+    __tablename__ = 'balance_snapshots'
+    __table_args__ = (
+        db.UniqueConstraint('account_number', 'month', name='uq_balance_snapshots_account_month'),
+        # Newest-first scan for /api/statements/recent
+        db.Index('ix_balance_snapshots_updated_at', 'updated_at', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    account_number = db.Column(db.String(50), nullable=False)
+    month = db.Column(db.Date, nullable=False)  # First day of the month
+    opening_balance = db.Column(db.Numeric(14, 2), nullable=False)
+    closing_balance = db.Column(db.Numeric(14, 2), nullable=False)
+    money_in = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    money_out = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'account_number': self.account_number,
+            'month': self.month.strftime('%Y-%m'),
+            'opening_balance': float(self.opening_balance),
+            'closing_balance': float(self.closing_balance),
+            'money_in': float(self.money_in),
+            'money_out': float(self.money_out),
+            'transaction_count': self.transaction_count
+        }
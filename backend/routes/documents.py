@@ -0,0 +1,55 @@
+from flask import Blueprint, request, jsonify, current_app
+from ..utils.metrics import stage
+from ..utils.money import currency_exponent, to_minor
+from ..utils.render_cache import cached_document_response, cached_pdf_response
+from ..utils.settings_cache import statement_branding
+from ..utils.statement_engine import StatementColumns
+from datetime import datetime
+import re
+
+documents_bp = Blueprint('documents', __name__)
+
+@documents_bp.route('/api/bank-statement/generate', methods=['POST'])
+def generate_bank_statement():
+    with stage('bank_statement', 'parse'):
+        data = request.get_json()
+    if not data:
+        return jsonify({'message': 'No data provided'}), 400
+
+    try:
+        data = statement_branding(current_app._get_current_object(), data)
+        # Supplied balances must match the running total from the opening balance
+        exponent = currency_exponent(data.get('currency', 'KES'))
+        columns = StatementColumns(data.get('transactions', []), exponent)
+        mismatches = columns.balance_mismatches(to_minor(data.get('initialBalance', 0), exponent))
+        if mismatches:
+            return jsonify({
+                'message': 'Transaction balances do not add up',
+                'rows': [idx + 1 for idx in mismatches[:100]]
+            }), 422
+
+        # ReportLab loads on the first render, not at startup
+        from ..utils.bank_statement_generator import generate_bank_statement_pdf
+        return cached_pdf_response(
+            current_app._get_current_object(),
+            'bank_statement',
+            data,
+            generate_bank_statement_pdf,
+            f"bank_statement_{data.get('accountNumber', '')}_{datetime.now().strftime('%Y%m%d')}.pdf"
+        )
+    except ValueError as e:
+        # Amounts that are not finite numbers, or a row too tall for a page
+        return jsonify({'message': str(e)}), 422
+    except Exception as e:
+        print(f"Error generating bank statement: {str(e)}")
+        return jsonify({'message': 'An error occurred while generating the bank statement'}), 500
+
+@documents_bp.route('/api/documents/<key>', methods=['GET'])
+def get_document(key):
+    if not re.fullmatch(r'[0-9a-f]{64}', key):
+        return jsonify({'message': 'Document not found'}), 404
+
+    response = cached_document_response(current_app._get_current_object(), key)
+    if response is None:
+        return jsonify({'message': 'Document not found'}), 404
+    return response
@@ -0,0 +1,57 @@
+from flask import Blueprint, request, jsonify, send_file, current_app, url_for
+from ..utils.jobs import get_job_queue
+from ..utils.settings_cache import payslip_branding, statement_branding
+from datetime import datetime
+
+jobs_bp = Blueprint('jobs', __name__)
+
+# Branding is applied here, in the request, so workers never touch the database
+BRANDING = {'payslip': payslip_branding, 'bank_statement': statement_branding}
+
+def _submit(kind, download_name):
+    data = request.get_json()
+    if not data:
+        return jsonify({'message': 'No data provided'}), 400
+
+    data = BRANDING[kind](current_app._get_current_object(), data)
+    job = get_job_queue(current_app).submit(kind, data, download_name)
+    return jsonify({
+        'job': job,
+        'status_url': url_for('jobs.get_job', job_id=job['id']),
+        'download_url': url_for('jobs.download_job', job_id=job['id'])
+    }), 202
+
+@jobs_bp.route('/api/jobs/payslip', methods=['POST'])
+def submit_payslip_job():
+    return _submit('payslip', f"payslip_{datetime.now().strftime('%Y%m%d')}.pdf")
+
+@jobs_bp.route('/api/jobs/bank-statement', methods=['POST'])
+def submit_bank_statement_job():
+    account_number = (request.get_json(silent=True) or {}).get('accountNumber', '')
+    return _submit('bank_statement', f"bank_statement_{account_number}_{datetime.now().strftime('%Y%m%d')}.pdf")
+
+@jobs_bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = get_job_queue(current_app).get(job_id)
+    if not job:
+        return jsonify({'message': 'Job not found'}), 404
+    return jsonify({'job': job}), 200
+
+@jobs_bp.route('/api/jobs/<job_id>/download', methods=['GET'])
+def download_job(job_id):
+    queue = get_job_queue(current_app)
+    job = queue.get(job_id)
+    if not job:
+        return jsonify({'message': 'Job not found'}), 404
+
+    result = queue.result(job_id)
+    if not result:
+        return jsonify({'message': 'Job is not finished', 'job': job}), 409
+
+    path, download_name = result
+    return send_file(
+        path,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=download_name
+    )
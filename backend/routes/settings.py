@@ -1,15 +1,35 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from ..models.settings import Settings
 from ..config.db import db
+from ..utils.settings_cache import get_settings_cache
 
 settings_bp = Blueprint('settings', __name__)
 
+LOGO_FIELDS = ('company_logo', 'bank_logo')
+
 @settings_bp.route('/api/settings', methods=['GET'])
 def get_settings():
-    settings = Settings.query.first()
+    # ?logos=false leaves out the base64 logos (has_company_logo / has_bank_logo
+    # say whether they are set). Each variant has its own ETag, built from the
+    # row's version stamp, so polling clients get 304s until the next save.
+    include_logos = request.args.get('logos', 'true').lower() not in ('0', 'false', 'no')
+    stamp, settings = get_settings_cache(current_app).get(Settings)
     if not settings:
         return jsonify({'message': 'No settings found'}), 404
-    return jsonify(settings.to_dict())
+
+    etag = stamp if include_logos else f"{stamp}-nologo"
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        if include_logos:
+            body = settings
+        else:
+            body = {key: value for key, value in settings.items() if key not in LOGO_FIELDS}
+            body.update({f'has_{field}': bool(settings.get(field)) for field in LOGO_FIELDS})
+        response = jsonify(body)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @settings_bp.route('/api/settings', methods=['POST'])
 def save_settings():
@@ -28,6 +48,10 @@ def save_settings():
     
     try:
         db.session.commit()
+        get_settings_cache(current_app).invalidate(Settings)
+        # Decode the logos now so the next render (or payroll run) hits the cache
+        from ..utils.logo_cache import warm_logo_cache
+        warm_logo_cache(settings.company_logo, settings.bank_logo)
         return jsonify(settings.to_dict()), 200
     except Exception as e:
         db.session.rollback()
@@ -1,15 +1,75 @@
-from flask import Blueprint, request, jsonify
-from ..models.transactions import Transaction
+from flask import Blueprint, request, jsonify, send_file, current_app, Response, stream_with_context, url_for
+from ..models.transactions import Transaction, BalanceSnapshot
 from ..config.db import db
+from ..utils.balance_snapshots import balance_at, balance_before, refresh_snapshots
+from ..utils.batch_statements import (
+    batch_running, load_checkpoint, lock_batch, new_checkpoint, purge_expired_batches, run_batch_statements,
+    save_checkpoint, zip_statements
+)
+from ..utils.pagination import decode_cursor, encode_cursor, page_size
+from ..utils.query_cache import get_query_cache
+from ..utils.money import to_decimal
+from ..utils.settings_cache import statement_branding
+from ..utils.statement_engine import StatementColumns
+from ..utils.transaction_ingest import insert_transactions, iter_csv_rows, iter_ndjson_rows, upsert_transactions
+from sqlalchemy import and_, or_
 from datetime import datetime
+import json
+import os
+import tempfile
+import threading
+import uuid
 
 transactions_bp = Blueprint('transactions', __name__)
 
+# Rows serialized per chunk written to the socket when streaming
+STREAM_CHUNK_ROWS = 200
+
+def _stream_transactions(query, response_format):
+    # ndjson: one object per line. stream: a regular JSON array sent in chunks.
+    # Either way rows come from a server-side cursor and are never all in memory.
+    ndjson = response_format == 'ndjson'
+    separator = '\n' if ndjson else ','
+
+    def generate():
+        yield '' if ndjson else '['
+        chunk = []
+        written = False
+        for t in query.yield_per(STREAM_CHUNK_ROWS):
+            chunk.append(json.dumps(t.to_dict()))
+            if len(chunk) >= STREAM_CHUNK_ROWS:
+                yield (separator if written else '') + separator.join(chunk)
+                chunk = []
+                written = True
+        if chunk:
+            yield (separator if written else '') + separator.join(chunk)
+            written = True
+        if ndjson:
+            yield '\n' if written else ''
+        else:
+            yield ']'
+
+    mimetype = 'application/x-ndjson' if ndjson else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
 @transactions_bp.route('/api/transactions', methods=['GET'])
 def get_transactions():
     account_number = request.args.get('account_number')
     from_date = request.args.get('from_date')
     to_date = request.args.get('to_date')
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+    response_format = request.args.get('format', 'json')
+
+    # Parsed up front so a bad date is a 400 on every path, not a string
+    # comparison in the filter or a 500 from the period balances
+    try:
+        if from_date:
+            from_date = datetime.strptime(from_date, '%Y-%m-%d').date()
+        if to_date:
+            to_date = datetime.strptime(to_date, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'from_date and to_date must be formatted YYYY-MM-DD'}), 400
     
     query = Transaction.query
     
@@ -19,37 +79,357 @@ def get_transactions():
         query = query.filter(Transaction.date >= from_date)
     if to_date:
         query = query.filter(Transaction.date <= to_date)
-        
-    transactions = query.order_by(Transaction.date).all()
-    return jsonify([t.to_dict() for t in transactions])
+
+    query = query.order_by(Transaction.date, Transaction.id)
+    if response_format in ('ndjson', 'stream'):
+        return _stream_transactions(query, response_format)
+    if limit is None and cursor is None:
+        transactions = query.all()
+        return jsonify([t.to_dict() for t in transactions])
+
+    # Keyset pagination: continue after the (date, id) of the previous page's last row
+    try:
+        size = page_size(limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if cursor:
+        # Any token that isn't one of ours, e.g. [123, 5] or ["2024-01-31", "x"],
+        # is a bad request rather than a failed query
+        try:
+            last_date, last_id = decode_cursor(cursor)
+            last_date = datetime.strptime(last_date, '%Y-%m-%d').date()
+            if type(last_id) is not int:
+                raise ValueError('Invalid cursor')
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        query = query.filter(or_(
+            Transaction.date > last_date,
+            and_(Transaction.date == last_date, Transaction.id > last_id)
+        ))
+
+    transactions = query.limit(size + 1).all()
+    next_cursor = None
+    if len(transactions) > size:
+        transactions = transactions[:size]
+        last = transactions[-1]
+        next_cursor = encode_cursor([last.date.isoformat(), last.id])
+
+    result = {
+        'transactions': [t.to_dict() for t in transactions],
+        'next_cursor': next_cursor
+    }
+    if account_number:
+        result.update(_period_balances(account_number, from_date, to_date))
+        result.update(_page_totals(transactions))
+    return jsonify(result)
+
+def _page_totals(transactions):
+    # The page's money in / out, and the transaction_ids whose stored balance does
+    # not follow from the row before it (a replace import stores balances as sent)
+    columns = StatementColumns(
+        {'moneyIn': t.money_in, 'moneyOut': t.money_out, 'balance': t.balance}
+        for t in transactions
+    )
+    mismatches = []
+    if transactions:
+        opening = columns.balance[0] - columns.money_in[0] + columns.money_out[0]
+        mismatches = [transactions[idx].transaction_id for idx in columns.balance_mismatches(opening)]
+    return {
+        'page_money_in': float(to_decimal(sum(columns.money_in))),
+        'page_money_out': float(to_decimal(sum(columns.money_out))),
+        'balance_mismatches': mismatches
+    }
+
+def _period_balances(account_number, from_date, to_date):
+    table = Transaction.__table__
+    opening = None
+    if from_date:
+        opening = balance_before(db.session, table, BalanceSnapshot.__table__, account_number, from_date)
+    closing = balance_at(db.session, table, account_number, to_date or datetime.max.date())
+    return {
+        'opening_balance': float(opening) if opening is not None else None,
+        'closing_balance': float(closing) if closing is not None else None
+    }
+
+@transactions_bp.route('/api/transactions/balances', methods=['GET'])
+def get_balance_snapshots():
+    account_number = request.args.get('account_number')
+    from_month = request.args.get('from_month')
+    to_month = request.args.get('to_month')
+
+    if not account_number:
+        return jsonify({'error': 'account_number is required'}), 400
+
+    try:
+        query = BalanceSnapshot.query.filter_by(account_number=account_number)
+        if from_month:
+            query = query.filter(BalanceSnapshot.month >= datetime.strptime(from_month, '%Y-%m').date())
+        if to_month:
+            query = query.filter(BalanceSnapshot.month <= datetime.strptime(to_month, '%Y-%m').date())
+    except ValueError:
+        return jsonify({'error': 'Months must be formatted YYYY-MM'}), 400
+
+    return jsonify([s.to_dict() for s in query.order_by(BalanceSnapshot.month).all()])
+
+def _request_rows():
+    # JSON bodies carry the account in the payload; CSV / NDJSON bodies are streamed
+    # and take it from the query string
+    if request.mimetype == 'text/csv':
+        return request.args.get('account_name'), request.args.get('account_number'), iter_csv_rows(request.stream)
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        return request.args.get('account_name'), request.args.get('account_number'), iter_ndjson_rows(request.stream)
+
+    data = request.json
+    return data.get('account_name'), data.get('account_number'), data.get('transactions', [])
 
 @transactions_bp.route('/api/transactions', methods=['POST'])
 def save_transactions():
-    data = request.json
-    transactions_data = data.get('transactions', [])
-    account_name = data.get('account_name')
-    account_number = data.get('account_number')
+    account_name, account_number, rows = _request_rows()
+    # replace (default) rewrites the account; upsert merges on transaction_id
+    mode = request.args.get('mode') or (request.json.get('mode') if request.is_json else None) or 'replace'
+
+    if not account_name or not account_number:
+        return jsonify({'error': 'account_name and account_number are required'}), 400
+    if mode not in ('replace', 'upsert'):
+        return jsonify({'error': f'Unknown mode: {mode}'}), 400
     
+    batch_size = current_app.config.get('TRANSACTION_BATCH_SIZE', 1000)
     try:
-        # First, remove old transactions for this account
-        Transaction.query.filter_by(account_number=account_number).delete()
-        
-        # Add new transactions
-        for t in transactions_data:
-            transaction = Transaction(
-                transaction_id=t['id'],
-                account_name=account_name,
-                account_number=account_number,
-                date=datetime.strptime(t['date'], '%Y-%m-%d').date(),
-                description=t['description'],
-                money_in=t['moneyIn'],
-                money_out=t['moneyOut'],
-                balance=t['balance']
+        if mode == 'upsert':
+            summary, errors = upsert_transactions(
+                db.session, Transaction.__table__, rows, account_name, account_number, batch_size
+            )
+        else:
+            # First, remove old transactions for this account
+            Transaction.query.filter_by(account_number=account_number).delete()
+
+            # Add new transactions in executemany batches
+            inserted, errors = insert_transactions(
+                db.session, Transaction.__table__, rows, account_name, account_number, batch_size
+            )
+            summary = {'inserted': inserted}
+
+        if errors:
+            db.session.rollback()
+            return jsonify({'error': 'Invalid transactions', 'rows': errors}), 422
+
+        # Keep month snapshots in step: all of them after a replace, only the
+        # changed tail after an upsert
+        if mode == 'replace' or summary.get('rebalanced_from'):
+            changed_from = summary.get('rebalanced_from')
+            refresh_snapshots(
+                db.session,
+                Transaction.__table__,
+                BalanceSnapshot.__table__,
+                account_number,
+                datetime.strptime(changed_from, '%Y-%m-%d').date() if changed_from else None,
+                batch_size
             )
-            db.session.add(transaction)
             
         db.session.commit()
-        return jsonify({'message': 'Transactions saved successfully'}), 200
+        get_query_cache(current_app).invalidate('recent_statements')
+        return jsonify({'message': 'Transactions saved successfully', **summary}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
+
+def iter_statement_rows(query, batch_size=1000):
+    # Rows in the shape the statement generator expects, fetched batch by batch
+    for t in query.yield_per(batch_size):
+        yield {
+            'date': t.date.isoformat(),
+            'id': t.transaction_id,
+            'description': t.description or '',
+            'moneyIn': t.money_in or 0,
+            'moneyOut': t.money_out or 0,
+            'balance': t.balance
+        }
+
+@transactions_bp.route('/api/transactions/statement', methods=['GET'])
+def transactions_statement():
+    account_number = request.args.get('account_number')
+    from_date = request.args.get('from_date')
+    to_date = request.args.get('to_date')
+
+    if not account_number:
+        return jsonify({'error': 'account_number is required'}), 400
+    # Parsed up front, as in get_transactions, so a bad date is a 400 and not a 500
+    try:
+        period_from = datetime.strptime(from_date, '%Y-%m-%d').date() if from_date else None
+        period_to = datetime.strptime(to_date, '%Y-%m-%d').date() if to_date else None
+    except ValueError:
+        return jsonify({'error': 'from_date and to_date must be formatted YYYY-MM-DD'}), 400
+
+    try:
+        query = Transaction.query.filter_by(account_number=account_number)
+        opening_balance = 0
+        if period_from:
+            opening_balance = balance_before(
+                db.session,
+                Transaction.__table__,
+                BalanceSnapshot.__table__,
+                account_number,
+                period_from
+            ) or 0
+            query = query.filter(Transaction.date >= period_from)
+        if period_to:
+            query = query.filter(Transaction.date <= period_to)
+        query = query.order_by(Transaction.date, Transaction.id)
+
+        first = query.with_entities(Transaction.account_name).first()
+        data = statement_branding(current_app._get_current_object(), {
+            'accountName': first.account_name if first else '',
+            'accountNumber': account_number,
+            'fromDate': from_date or '',
+            'toDate': to_date or '',
+            'initialBalance': opening_balance
+        })
+
+        # ReportLab loads on the first render, not at startup
+        from ..utils.bank_statement_generator import generate_bank_statement_pdf_stream
+        pdf_buffer = generate_bank_statement_pdf_stream(data, iter_statement_rows(query))
+        return send_file(
+            pdf_buffer,
+            mimetype='application/pdf',
+            as_attachment=True,
+            download_name=f"bank_statement_{account_number}_{datetime.now().strftime('%Y%m%d')}.pdf"
+        )
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _batch_root(app):
+    root = app.config.get('STATEMENT_BATCH_DIR') or os.path.join(tempfile.gettempdir(), 'payslip_statement_batches')
+    os.makedirs(root, exist_ok=True)
+    return root
+
+def _batch_paths(app, batch_id):
+    # (statements directory, ZIP path); None for ids that are not ours
+    if len(batch_id) != 32 or any(c not in '0123456789abcdef' for c in batch_id):
+        return None
+    directory = os.path.join(_batch_root(app), batch_id)
+    return directory, directory + '.zip'
+
+def _run_batch(app, batch_id, from_date, to_date, resume, lock):
+    # Runs in a background thread, holding the batch's lock file until the ZIP is written
+    directory, zip_path = _batch_paths(app, batch_id)
+    try:
+        with app.app_context():
+            defaults = statement_branding(app, {})
+            checkpoint = run_batch_statements(
+                db.session, Transaction.__table__, BalanceSnapshot.__table__, directory, from_date, to_date,
+                defaults=defaults,
+                workers=app.config.get('STATEMENT_BATCH_WORKERS'),
+                resume=resume,
+                batch_size=app.config.get('TRANSACTION_BATCH_SIZE', 1000),
+                lock=lock
+            )
+            if checkpoint['status'] == 'done':
+                zip_statements(directory, zip_path)
+            print(f"Statement batch {batch_id}: {len(checkpoint['done'])}/{checkpoint['total']} accounts, "
+                  f"{checkpoint['statements_per_second']} statements/sec")
+    except Exception as e:
+        print(f"Error running statement batch {batch_id}: {str(e)}")
+    finally:
+        lock.close()
+
+def _start_batch(batch_id, from_date, to_date, resume=False):
+    # The lock is taken here, in the request, so two resumes can never both
+    # start; it lives in the batch directory, so this holds across web workers
+    lock = lock_batch(_batch_paths(current_app, batch_id)[0])
+    if lock is None:
+        return False
+    thread = threading.Thread(
+        target=_run_batch,
+        args=(current_app._get_current_object(), batch_id, from_date, to_date, resume, lock),
+        daemon=True
+    )
+    thread.start()
+    return True
+
+def _batch_status(batch_id, checkpoint, directory, zip_path):
+    status = checkpoint['status']
+    if status in ('queued', 'running') and not batch_running(directory):
+        # The process running it stopped; resume picks up from the checkpoint
+        status = 'interrupted'
+    total = checkpoint['total']
+    return {
+        'id': batch_id,
+        'status': status,
+        'from_date': checkpoint['from_date'],
+        'to_date': checkpoint['to_date'],
+        'total': total,
+        'completed': len(checkpoint['done']),
+        'failed': checkpoint['failed'],
+        'progress': round(len(checkpoint['done']) / total, 4) if total else (1.0 if status == 'done' else 0.0),
+        'bytes': checkpoint['bytes'],
+        'started_at': checkpoint['started_at'],
+        'finished_at': checkpoint['finished_at'],
+        'error': checkpoint['error'],
+        'archive_ready': status == 'done' and os.path.exists(zip_path)
+    }
+
+def _batch_response(batch_id, checkpoint, paths, code=200):
+    return jsonify({
+        'batch': _batch_status(batch_id, checkpoint, *paths),
+        'status_url': url_for('transactions.get_statement_batch', batch_id=batch_id),
+        'download_url': url_for('transactions.download_statement_batch', batch_id=batch_id)
+    }), code
+
+@transactions_bp.route('/api/transactions/statements/batch', methods=['POST'])
+def start_statement_batch():
+    # Statements for every account with transactions in the period, rendered in
+    # the background; poll the status URL and fetch the ZIP when it is done
+    data = request.get_json(silent=True) or {}
+    from_date = data.get('from_date')
+    to_date = data.get('to_date')
+    try:
+        for value in (from_date, to_date):
+            if value:
+                datetime.strptime(value, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Dates must be formatted YYYY-MM-DD'}), 400
+
+    purge_expired_batches(_batch_root(current_app), current_app.config.get('STATEMENT_BATCH_RETENTION_SECONDS', 86400))
+    batch_id = uuid.uuid4().hex
+    paths = _batch_paths(current_app, batch_id)
+    os.makedirs(paths[0])
+    checkpoint = new_checkpoint(from_date, to_date)
+    save_checkpoint(paths[0], checkpoint)
+    _start_batch(batch_id, from_date, to_date)
+    return _batch_response(batch_id, checkpoint, paths, 202)
+
+@transactions_bp.route('/api/transactions/statements/batch/<batch_id>', methods=['GET'])
+def get_statement_batch(batch_id):
+    paths = _batch_paths(current_app, batch_id)
+    checkpoint = load_checkpoint(paths[0]) if paths else None
+    if not checkpoint:
+        return jsonify({'error': 'Batch not found'}), 404
+    return _batch_response(batch_id, checkpoint, paths)
+
+@transactions_bp.route('/api/transactions/statements/batch/<batch_id>/resume', methods=['POST'])
+def resume_statement_batch(batch_id):
+    paths = _batch_paths(current_app, batch_id)
+    checkpoint = load_checkpoint(paths[0]) if paths else None
+    if not checkpoint:
+        return jsonify({'error': 'Batch not found'}), 404
+    if checkpoint['status'] == 'done':
+        return _batch_response(batch_id, checkpoint, paths)
+    if not _start_batch(batch_id, checkpoint['from_date'], checkpoint['to_date'], resume=True):
+        return jsonify({'error': 'Batch is already running'}), 409
+    return _batch_response(batch_id, checkpoint, paths, 202)
+
+@transactions_bp.route('/api/transactions/statements/batch/<batch_id>/download', methods=['GET'])
+def download_statement_batch(batch_id):
+    paths = _batch_paths(current_app, batch_id)
+    checkpoint = load_checkpoint(paths[0]) if paths else None
+    if not checkpoint:
+        return jsonify({'error': 'Batch not found'}), 404
+    if checkpoint['status'] != 'done' or not os.path.exists(paths[1]):
+        return jsonify({'error': 'Batch is not finished', 'batch': _batch_status(batch_id, checkpoint, *paths)}), 409
+
+    return send_file(
+        paths[1],
+        mimetype='application/zip',
+        as_attachment=True,
+        download_name=f"bank_statements_{checkpoint['from_date'] or 'start'}_{checkpoint['to_date'] or 'end'}.zip"
+    )
@@ -0,0 +1,110 @@
+from datetime import datetime
+from sqlalchemy import func, select
+from .transaction_ingest import iter_account_pages
+
+def _month_start(value):
+    return value.replace(day=1)
+
+def refresh_snapshots(session, transactions, snapshots, account_number, from_date=None, batch_size=1000):
+    # Rebuilds month snapshots from from_date's month onward (or all of them).
+    # Earlier months are untouched, so a late edit only rescans its own tail.
+    month = _month_start(from_date) if from_date else None
+
+    delete = snapshots.delete().where(snapshots.c.account_number == account_number)
+    opening = None
+    if month is not None:
+        delete = delete.where(snapshots.c.month >= month)
+        opening = session.execute(
+            select(snapshots.c.closing_balance)
+            .where(snapshots.c.account_number == account_number, snapshots.c.month < month)
+            .order_by(snapshots.c.month.desc())
+            .limit(1)
+        ).scalar()
+    session.execute(delete)
+
+    now = datetime.utcnow()
+    pending = []
+    current = None
+    columns = (transactions.c.money_in, transactions.c.money_out, transactions.c.balance)
+    for page in iter_account_pages(session, transactions, account_number, month, columns, batch_size):
+        for row in page:
+            money_in = row.money_in or 0
+            money_out = row.money_out or 0
+            row_month = _month_start(row.date)
+            if current is None or current['month'] != row_month:
+                if current is not None:
+                    pending.append(current)
+                    opening = current['closing_balance']
+                if opening is None:
+                    opening = row.balance - money_in + money_out
+                current = {
+                    'account_number': account_number,
+                    'month': row_month,
+                    'opening_balance': opening,
+                    'closing_balance': opening,
+                    'money_in': 0,
+                    'money_out': 0,
+                    'transaction_count': 0,
+                    'updated_at': now
+                }
+            current['money_in'] += money_in
+            current['money_out'] += money_out
+            current['transaction_count'] += 1
+            current['closing_balance'] = row.balance
+
+        if len(pending) >= batch_size:
+            session.execute(snapshots.insert(), pending)
+            pending = []
+
+    if current is not None:
+        pending.append(current)
+    if pending:
+        session.execute(snapshots.insert(), pending)
+
+def balance_before(session, transactions, snapshots, account_number, day):
+    # Balance at the start of `day`: one lookup on the snapshot table when the day
+    # starts a month, otherwise one on the (account_number, date, id) index
+    if day.day == 1:
+        closing = session.execute(
+            select(snapshots.c.closing_balance)
+            .where(snapshots.c.account_number == account_number, snapshots.c.month < day)
+            .order_by(snapshots.c.month.desc())
+            .limit(1)
+        ).scalar()
+        if closing is not None:
+            return closing
+
+    return session.execute(
+        select(transactions.c.balance)
+        .where(transactions.c.account_number == account_number, transactions.c.date < day)
+        .order_by(transactions.c.date.desc(), transactions.c.id.desc())
+        .limit(1)
+    ).scalar()
+
+def balance_at(session, transactions, account_number, day):
+    # Balance at the end of `day` (after its last transaction)
+    return session.execute(
+        select(transactions.c.balance)
+        .where(transactions.c.account_number == account_number, transactions.c.date <= day)
+        .order_by(transactions.c.date.desc(), transactions.c.id.desc())
+        .limit(1)
+    ).scalar()
+
+def balances_before(session, transactions, snapshots, day):
+    # balance_before() for every account in one query: {account_number: balance}.
+    # Month starts read the latest earlier snapshot per account, other days the
+    # latest earlier transaction; accounts with nothing before `day` are absent.
+    if day.day == 1:
+        table, order, balance = snapshots, (snapshots.c.month.desc(),), snapshots.c.closing_balance
+        condition = snapshots.c.month < day
+    else:
+        table, order, balance = transactions, (transactions.c.date.desc(), transactions.c.id.desc()), transactions.c.balance
+        condition = transactions.c.date < day
+
+    ranked = select(
+        table.c.account_number,
+        balance.label('balance'),
+        func.row_number().over(partition_by=table.c.account_number, order_by=order).label('position')
+    ).where(condition).subquery()
+    rows = session.execute(select(ranked.c.account_number, ranked.c.balance).where(ranked.c.position == 1))
+    return {row.account_number: row.balance for row in rows}
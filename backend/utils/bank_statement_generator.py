@@ -1,36 +1,33 @@
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, Frame
+from reportlab.pdfgen import canvas
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.units import inch, cm
 from reportlab.graphics.shapes import Line, Drawing
-from .pdf_styles import get_bank_statement_styles, BANK_STATEMENT_COLORS
+from .logo_cache import get_logo
+from .metrics import observe, stage
+from .money import currency_exponent, format_money, to_minor
+from .statement_engine import statement_rows
+from .pdf_styles import footer_timestamp, get_bank_statement_styles, get_bank_statement_table_styles
 import io
 import base64
 from datetime import datetime
 
-def generate_bank_statement_pdf(data):
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=landscape(A4),
-        rightMargin=36,
-        leftMargin=36,
-        topMargin=36,
-        bottomMargin=36
-    )
-    
-    # Get styles
-    styles = get_bank_statement_styles()
+PAGE_SIZE = landscape(A4)
+MARGIN = 36
+TRANSACTION_HEADER = ['No.', 'Date', 'Transaction ID', 'Description', 'Money In', 'Money Out', 'Balance']
+TRANSACTION_COL_WIDTHS = [0.5*inch, 1*inch, 1.5*inch, 3*inch, 1.5*inch, 1.5*inch, 1.5*inch]
+# Statements longer than this are rendered page by page instead of as one big Table
+STREAM_THRESHOLD = 2000
+
+def _statement_header(data, styles, table_styles):
     elements = []
-    
+
     # Add bank logo if available
     if data.get('bank_logo'):
         try:
-            logo_data = base64.b64decode(data['bank_logo'].split(',')[1])
-            logo_buffer = io.BytesIO(logo_data)
-            logo = Image(logo_buffer, width=2*inch, height=1*inch)
-            logo.hAlign = 'CENTER'
-            elements.append(logo)
+            with stage('bank_statement', 'logo'):
+                elements.append(get_logo(data['bank_logo']))
             elements.append(Spacer(1, 20))
         except:
             pass
@@ -54,121 +51,227 @@ def generate_bank_statement_pdf(data):
     account_table = Table(
         account_data,
         colWidths=[2*inch, 4*inch],
-        style=TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('TEXTCOLOR', (0, 0), (-1, -1), BANK_STATEMENT_COLORS['text']),
-            ('GRID', (0, 0), (-1, -1), 0.25, colors.white),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ])
+        style=table_styles['account']
     )
     elements.append(account_table)
     elements.append(Spacer(1, 20))
     
     # Add initial balance
-    initial_balance = float(data.get('initialBalance', 0))
+    currency = data.get('currency', 'KES')
+    initial_balance = to_minor(data.get('initialBalance', 0), currency_exponent(currency))
     initial_balance_data = [
-        ['Opening Balance:', f"{data.get('currency', 'KES')} {initial_balance:,.2f}"]
+        ['Opening Balance:', format_money(initial_balance, currency)]
     ]
     
     initial_balance_table = Table(
         initial_balance_data,
         colWidths=[2*inch, 4*inch],
-        style=TableStyle([
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('TEXTCOLOR', (0, 0), (-1, -1), BANK_STATEMENT_COLORS['balance']),
-            ('GRID', (0, 0), (-1, -1), 0.25, colors.white),
-        ])
+        style=table_styles['opening_balance']
     )
     elements.append(initial_balance_table)
     elements.append(Spacer(1, 20))
+    return elements
+
+def _closing_balance_table(closing_balance, currency, table_styles):
+    closing_balance_data = [
+        ['', '', '', '', '', 'Closing Balance:', format_money(closing_balance, currency)]
+    ]
     
-    # Add transactions
+    return Table(
+        closing_balance_data,
+        colWidths=TRANSACTION_COL_WIDTHS,
+        style=table_styles['closing_balance']
+    )
+
+def _footer(styles, generated_at):
+    footer_text = f"Generated on {generated_at.strftime('%Y-%m-%d %H:%M:%S')}"
+    return Paragraph(footer_text, styles['BankInfo'])
+
+def generate_bank_statement_pdf(data):
     transactions = data.get('transactions', [])
+    if len(transactions) > STREAM_THRESHOLD:
+        return generate_bank_statement_pdf_stream(data, transactions)
+
+    generated_at, invariant = footer_timestamp(data)
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        invariant=invariant,
+        pagesize=PAGE_SIZE,
+        rightMargin=MARGIN,
+        leftMargin=MARGIN,
+        topMargin=MARGIN,
+        bottomMargin=MARGIN
+    )
+    
+    # Get styles
+    with stage('bank_statement', 'styles'):
+        styles = get_bank_statement_styles()
+        table_styles = get_bank_statement_table_styles()
+    elements = _statement_header(data, styles, table_styles)
+    
+    # Add transactions
+    currency = data.get('currency', 'KES')
     if transactions:
-        # Table header
-        transactions_data = [
-            ['No.', 'Date', 'Transaction ID', 'Description', 'Money In', 'Money Out', 'Balance']
-        ]
-        
-        # Add transaction rows
-        for idx, transaction in enumerate(transactions, 1):
-            row = [
-                str(idx),
-                transaction.get('date', ''),
-                transaction.get('id', ''),
-                transaction.get('description', ''),
-                f"{data.get('currency', 'KES')} {float(transaction.get('moneyIn', 0)):,.2f}" if float(transaction.get('moneyIn', 0)) > 0 else '',
-                f"{data.get('currency', 'KES')} {float(transaction.get('moneyOut', 0)):,.2f}" if float(transaction.get('moneyOut', 0)) > 0 else '',
-                f"{data.get('currency', 'KES')} {float(transaction.get('balance', 0)):,.2f}"
-            ]
-            transactions_data.append(row)
+        # Each amount is parsed once and the balance summed in minor units
+        with stage('bank_statement', 'rows'):
+            exponent = currency_exponent(currency)
+            initial_balance = to_minor(data.get('initialBalance', 0), exponent)
+            rows, closing_balance = statement_rows(transactions, currency, initial_balance, exponent=exponent)
+            transactions_data = [TRANSACTION_HEADER] + rows
         
         # Create transactions table
-        col_widths = [0.5*inch, 1*inch, 1.5*inch, 3*inch, 1.5*inch, 1.5*inch, 1.5*inch]
         transactions_table = Table(
             transactions_data,
-            colWidths=col_widths,
+            colWidths=TRANSACTION_COL_WIDTHS,
             repeatRows=1,
-            style=TableStyle([
-                # Header style
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('TEXTCOLOR', (0, 0), (-1, 0), BANK_STATEMENT_COLORS['header']),
-                ('BACKGROUND', (0, 0), (-1, 0), BANK_STATEMENT_COLORS['table_header']),
-                
-                # Data alignment
-                ('ALIGN', (0, 1), (0, -1), 'CENTER'),  # No.
-                ('ALIGN', (1, 1), (1, -1), 'LEFT'),    # Date
-                ('ALIGN', (2, 1), (2, -1), 'LEFT'),    # Transaction ID
-                ('ALIGN', (3, 1), (3, -1), 'LEFT'),    # Description
-                ('ALIGN', (4, 1), (-1, -1), 'RIGHT'),  # Amounts
-                
-                # Fonts and colors
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('TEXTCOLOR', (4, 1), (4, -1), BANK_STATEMENT_COLORS['credit']),  # Money In
-                ('TEXTCOLOR', (5, 1), (5, -1), BANK_STATEMENT_COLORS['debit']),   # Money Out
-                ('TEXTCOLOR', (6, 1), (6, -1), BANK_STATEMENT_COLORS['balance']), # Balance
-                
-                # Grid
-                ('GRID', (0, 0), (-1, -1), 0.25, BANK_STATEMENT_COLORS['text']),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [BANK_STATEMENT_COLORS['table_row_odd'], BANK_STATEMENT_COLORS['table_row_even']]),
-            ])
+            style=table_styles['transactions']
         )
         elements.append(transactions_table)
         
         # Add closing balance
         elements.append(Spacer(1, 20))
-        closing_balance = float(transactions[-1].get('balance', 0))
-        closing_balance_data = [
-            ['', '', '', '', '', 'Closing Balance:', f"{data.get('currency', 'KES')} {closing_balance:,.2f}"]
-        ]
-        
-        closing_balance_table = Table(
-            closing_balance_data,
-            colWidths=col_widths,
-            style=TableStyle([
-                ('ALIGN', (-2, -1), (-1, -1), 'RIGHT'),
-                ('FONTNAME', (-2, -1), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (-2, -1), (-1, -1), 10),
-                ('TEXTCOLOR', (-1, -1), (-1, -1), BANK_STATEMENT_COLORS['balance']),
-                ('GRID', (0, 0), (-1, -1), 0.25, colors.white),
-            ])
-        )
-        elements.append(closing_balance_table)
+        elements.append(_closing_balance_table(closing_balance, currency, table_styles))
     
     # Add footer
     elements.append(Spacer(1, 40))
-    footer_text = f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-    elements.append(Paragraph(footer_text, styles['BankInfo']))
+    elements.append(_footer(styles, generated_at))
     
     # Build PDF
-    doc.build(elements)
+    with stage('bank_statement', 'build'):
+        doc.build(elements)
+    observe('payslip_statement_rows', len(transactions), document='bank_statement')
+    observe('payslip_pdf_bytes', buffer.tell(), document='bank_statement')
+    buffer.seek(0)
+    return buffer
+
+# Frame's default padding on each side
+FRAME_PADDING = 6
+
+def _new_frame():
+    width, height = PAGE_SIZE
+    return Frame(MARGIN, MARGIN, width - 2*MARGIN, height - 2*MARGIN)
+
+def _frame_size():
+    width, height = PAGE_SIZE
+    return width - 2*(MARGIN + FRAME_PADDING), height - 2*(MARGIN + FRAME_PADDING)
+
+def _flowables_height(flowables, width):
+    # Conservative: counts every spaceBefore, which a frame skips at the top of a page
+    total = 0
+    for flowable in flowables:
+        total += flowable.wrap(width, PAGE_SIZE[1])[1]
+        total += flowable.getSpaceBefore() + flowable.getSpaceAfter()
+    return total
+
+def _row_heights(table_styles, currency):
+    # Cells hold single-line strings, so every data row has the same height
+    sample = statement_rows([{'moneyIn': 1, 'moneyOut': 1, 'balance': 1}], currency)[0][0]
+    header_only = Table([TRANSACTION_HEADER], colWidths=TRANSACTION_COL_WIDTHS, style=table_styles['transactions'])
+    with_row = Table([TRANSACTION_HEADER, sample], colWidths=TRANSACTION_COL_WIDTHS, style=table_styles['transactions'])
+    header_height = header_only.wrap(0, 0)[1]
+    return header_height, with_row.wrap(0, 0)[1] - header_height
+
+def _remaining_height(frame):
+    # Space left below the frame's current position (what Frame.add measures against)
+    return frame._y - frame._y1p
+
+def _add_to_page(frame, c, flowable):
+    if frame.add(flowable, c):
+        return frame
+    c.showPage()
+    frame = _new_frame()
+    if not frame.add(flowable, c):
+        raise ValueError(f"{type(flowable).__name__} does not fit on an empty page")
+    return frame
+
+def generate_bank_statement_pdf_stream(data, transactions=None):
+    # Page-at-a-time renderer: rows are pulled from any iterable (e.g. a DB query
+    # generator) and drawn as one fixed-size Table per page, so layout memory stays
+    # flat no matter how long the statement is.
+    if transactions is None:
+        transactions = data.get('transactions', [])
+
+    generated_at, invariant = footer_timestamp(data)
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=PAGE_SIZE, invariant=invariant)
+    with stage('bank_statement_stream', 'styles'):
+        styles = get_bank_statement_styles()
+        table_styles = get_bank_statement_table_styles()
+    currency = data.get('currency', 'KES')
+    exponent = currency_exponent(currency)
+
+    frame_width, frame_height = _frame_size()
+    header = _statement_header(data, styles, table_styles)
+    first_page_height = frame_height - _flowables_height(header, frame_width)
+    frame = _new_frame()
+    frame.addFromList(header, c)
+
+    header_height, row_height = _row_heights(table_styles, currency)
+    page_rows = max(int((frame_height - header_height) // row_height), 1)
+    capacity = max(int((first_page_height - header_height) // row_height), 1)
+
+    def fitting_table(rows, available):
+        # The longest leading run of rows whose table fits in `available`. Rows
+        # are usually single-line and the first guess fits; multi-line cells
+        # make them taller, so shrink (proportionally, then row by row) until
+        # the measured table fits.
+        count = len(rows)
+        while count:
+            table = Table([TRANSACTION_HEADER] + rows[:count], colWidths=TRANSACTION_COL_WIDTHS,
+                          style=table_styles['transactions'])
+            height = table.wrap(frame_width, available)[1]
+            if height <= available:
+                return table, count
+            count = min(count - 1, int(count * available / height))
+        return None, 0
+
+    def flush(frame, pending, number, opening):
+        # Formats the pending rows in one pass, then draws them as one table per
+        # page, starting in whatever space is left on the current one
+        rows, closing = statement_rows(pending, currency, opening, number, exponent)
+        position = 0
+        while position < len(rows):
+            table, count = fitting_table(rows[position:], _remaining_height(frame))
+            if table is None:
+                if frame._atTop:
+                    raise ValueError(f"Transaction {number + position} is too tall to fit on a page")
+                c.showPage()
+                frame = _new_frame()
+                continue
+            if not frame.add(table, c):
+                raise ValueError(f"Transactions {number + position} to {number + position + count - 1} did not fit")
+            position += count
+        return frame, closing
+
+    # Raw transactions for about a page at a time; formatted and laid out per
+    # batch. With a query generator as the source, "pages" includes fetching the rows.
+    pending = []
+    number = 1
+    running_balance = to_minor(data.get('initialBalance', 0), exponent)
+    with stage('bank_statement_stream', 'pages'):
+        for transaction in transactions:
+            pending.append(transaction)
+            if len(pending) == capacity:
+                frame, running_balance = flush(frame, pending, number, running_balance)
+                number += len(pending)
+                pending = []
+                capacity = page_rows
+
+        if pending:
+            frame, running_balance = flush(frame, pending, number, running_balance)
+            number += len(pending)
+
+    if number > 1:
+        frame = _add_to_page(frame, c, Spacer(1, 20))
+        frame = _add_to_page(frame, c, _closing_balance_table(running_balance, currency, table_styles))
+
+    frame = _add_to_page(frame, c, Spacer(1, 40))
+    _add_to_page(frame, c, _footer(styles, generated_at))
+
+    with stage('bank_statement_stream', 'save'):
+        c.save()
+    observe('payslip_statement_rows', number - 1, document='bank_statement_stream')
+    observe('payslip_pdf_bytes', buffer.tell(), document='bank_statement_stream')
     buffer.seek(0)
     return buffer
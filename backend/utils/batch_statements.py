@@ -0,0 +1,356 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from itertools import groupby
+from sqlalchemy import func, select
+from .balance_snapshots import balances_before
+import fcntl
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import time
+import zipfile
+
+# Statements for every account with transactions in a period, from one ordered
+# scan of the transactions table. Rows are split by account as they stream in
+# and each account's PDF is rendered by a worker process straight into an
+# output directory. A checkpoint file in that directory records progress and
+# the finished accounts, so an interrupted run resumes where it stopped.
+
+CHECKPOINT_NAME = '.checkpoint.json'
+# Held (flock) by whichever process is running the batch; the OS drops it when
+# that process exits, so a crashed run never looks alive
+LOCK_NAME = '.lock'
+# Save the checkpoint after this many statements, or this many seconds
+CHECKPOINT_EVERY = 50
+CHECKPOINT_SECONDS = 2.0
+# Runs with fewer accounts than this are rendered inline
+MIN_POOL_SIZE = 8
+# Batch directories (and their ZIPs) are named by a uuid4 hex id
+BATCH_ID = re.compile(r'[0-9a-f]{32}')
+
+def statement_filename(account_number, from_date, to_date):
+    account = str(account_number).replace('/', '_').replace('\\', '_')
+    return f"bank_statement_{account}_{from_date or 'start'}_{to_date or 'end'}.pdf"
+
+def statement_row(t):
+    # Same shape as the single-account statement route's rows
+    return {
+        'date': t.date.isoformat(),
+        'id': t.transaction_id,
+        'description': t.description or '',
+        'moneyIn': t.money_in or 0,
+        'moneyOut': t.money_out or 0,
+        'balance': t.balance
+    }
+
+def _period_filter(table, from_date, to_date):
+    conditions = []
+    if from_date:
+        conditions.append(table.c.date >= from_date)
+    if to_date:
+        conditions.append(table.c.date <= to_date)
+    return conditions
+
+def count_accounts(session, table, from_date=None, to_date=None):
+    return session.execute(
+        select(func.count(func.distinct(table.c.account_number))).where(*_period_filter(table, from_date, to_date))
+    ).scalar() or 0
+
+def iter_accounts(session, table, from_date=None, to_date=None, skip=(), batch_size=1000):
+    # One query over the period in (account_number, date, id) order, served by
+    # the ix_transactions_account_date_id index and fetched batch_size rows at a
+    # time. Yields (account_number, account_name, rows) per account; rows of
+    # skipped accounts are read past without being kept.
+    query = select(
+        table.c.account_number,
+        table.c.account_name,
+        table.c.transaction_id,
+        table.c.date,
+        table.c.description,
+        table.c.money_in,
+        table.c.money_out,
+        table.c.balance
+    ).where(
+        *_period_filter(table, from_date, to_date)
+    ).order_by(
+        table.c.account_number, table.c.date, table.c.id
+    ).execution_options(yield_per=batch_size)
+
+    for account_number, group in groupby(session.execute(query), key=lambda row: row.account_number):
+        if account_number in skip:
+            for _ in group:
+                pass
+            continue
+        first = next(group)
+        rows = [statement_row(first)]
+        rows.extend(statement_row(t) for t in group)
+        yield account_number, first.account_name, rows
+
+def _init_worker(bank_logo):
+    # Pool workers start from a clean forkserver process rather than a fork of
+    # the (threaded) caller, so they load ReportLab and decode the logo here,
+    # once each, instead of inheriting them
+    from .bank_statement_generator import generate_bank_statement_pdf_stream
+    from .logo_cache import warm_logo_cache
+    from .pdf_styles import get_bank_statement_styles, get_bank_statement_table_styles
+    get_bank_statement_styles()
+    get_bank_statement_table_styles()
+    warm_logo_cache(bank_logo)
+
+def _render_statement(data, rows, path):
+    # Runs in a worker process; the PDF is written next to its final name and
+    # moved into place, so a crash never leaves a half-written statement
+    from .bank_statement_generator import generate_bank_statement_pdf_stream
+    pdf_bytes = generate_bank_statement_pdf_stream(data, rows).getvalue()
+    with open(path + '.tmp', 'wb') as f:
+        f.write(pdf_bytes)
+    os.replace(path + '.tmp', path)
+    return len(pdf_bytes)
+
+def load_checkpoint(output_dir):
+    path = os.path.join(output_dir, CHECKPOINT_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def save_checkpoint(output_dir, checkpoint):
+    path = os.path.join(output_dir, CHECKPOINT_NAME)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(path + '.tmp', path)
+
+def lock_batch(output_dir):
+    # Exclusive lock on the batch directory for the length of a run. Returns the
+    # open lock file (close it to release), or None if another process or
+    # thread holds it.
+    os.makedirs(output_dir, exist_ok=True)
+    handle = open(os.path.join(output_dir, LOCK_NAME), 'a')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+def batch_running(output_dir):
+    # True while some process, in any web or CLI worker on this host, is running the batch
+    if not os.path.exists(os.path.join(output_dir, LOCK_NAME)):
+        return False
+    handle = lock_batch(output_dir)
+    if handle is None:
+        return True
+    handle.close()
+    return False
+
+def new_checkpoint(from_date, to_date):
+    return {
+        'status': 'queued',
+        'from_date': from_date,
+        'to_date': to_date,
+        'total': None,
+        'done': [],
+        'failed': {},
+        'bytes': 0,
+        'started_at': None,
+        'finished_at': None,
+        'error': None
+    }
+
+def run_batch_statements(session, table, snapshots, output_dir, from_date=None, to_date=None, defaults=None,
+                         workers=None, resume=False, progress=None, batch_size=1000, lock=None):
+    # Renders every account's statement for the period into output_dir and
+    # returns the final checkpoint. With resume, accounts already done (per the
+    # checkpoint) are skipped and failed ones retried. progress, if given, is
+    # called with the checkpoint after each statement. Pass the handle from
+    # lock_batch() as lock when the caller already holds the batch's lock;
+    # otherwise it is taken (and released) here.
+    owned = lock is None
+    if owned:
+        lock = lock_batch(output_dir)
+        if lock is None:
+            raise ValueError(f"A batch is already running in {output_dir}")
+    try:
+        return _run_batch_statements(
+            session, table, snapshots, output_dir, from_date, to_date, defaults,
+            workers, resume, progress, batch_size
+        )
+    finally:
+        if owned:
+            lock.close()
+
+def _run_batch_statements(session, table, snapshots, output_dir, from_date, to_date, defaults,
+                          workers, resume, progress, batch_size):
+    checkpoint = load_checkpoint(output_dir) if resume else None
+    if checkpoint is None:
+        checkpoint = new_checkpoint(from_date, to_date)
+    elif (checkpoint['from_date'], checkpoint['to_date']) != (from_date, to_date):
+        raise ValueError(
+            f"Checkpoint is for {checkpoint['from_date']} to {checkpoint['to_date']}, not {from_date} to {to_date}"
+        )
+
+    defaults = defaults or {}
+    workers = workers or os.cpu_count() or 1
+    done = set(checkpoint['done'])
+    checkpoint.update({
+        'status': 'running',
+        'failed': {},
+        'error': None,
+        'started_at': checkpoint['started_at'] or datetime.utcnow().isoformat(),
+        'finished_at': None,
+        'total': count_accounts(session, table, from_date, to_date)
+    })
+    # Opening balances for every account up front, in one query, so nothing else
+    # runs on the connection while the scan's cursor is open
+    openings = {}
+    if from_date:
+        openings = balances_before(session, table, snapshots, datetime.strptime(from_date, '%Y-%m-%d').date())
+    save_checkpoint(output_dir, checkpoint)
+
+    started = time.perf_counter()
+    last_saved = [time.monotonic(), len(done)]
+
+    def finished(account_number, size=None, error=None):
+        if error is None:
+            done.add(account_number)
+            checkpoint['done'].append(account_number)
+            checkpoint['bytes'] += size
+        else:
+            checkpoint['failed'][account_number] = error
+        completed = len(done)
+        if completed - last_saved[1] >= CHECKPOINT_EVERY or time.monotonic() - last_saved[0] >= CHECKPOINT_SECONDS:
+            save_checkpoint(output_dir, checkpoint)
+            last_saved[:] = [time.monotonic(), completed]
+        if progress:
+            progress(checkpoint)
+
+    def jobs():
+        for account_number, account_name, rows in iter_accounts(
+            session, table, from_date, to_date, done, batch_size
+        ):
+            data = dict(defaults)
+            data.update({
+                'accountName': account_name,
+                'accountNumber': account_number,
+                'fromDate': from_date or '',
+                'toDate': to_date or '',
+                'initialBalance': openings.get(account_number) or 0
+            })
+            path = os.path.join(output_dir, statement_filename(account_number, from_date, to_date))
+            yield account_number, (data, rows, path)
+
+    pending = checkpoint['total'] - len(done)
+    try:
+        if workers == 1 or pending < MIN_POOL_SIZE:
+            # Imported here, like the generator, so importing the app never loads PIL
+            from .logo_cache import warm_logo_cache
+            warm_logo_cache(defaults.get('bank_logo'))
+            for account_number, args in jobs():
+                try:
+                    finished(account_number, _render_statement(*args))
+                except Exception as e:
+                    finished(account_number, error=str(e))
+        else:
+            # This often runs on a web worker's background thread. A forked child
+            # would copy whatever locks other threads held at that moment (logging,
+            # the connection pool, ReportLab's caches) and could deadlock on them,
+            # so workers come from a forkserver instead.
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('forkserver'),
+                initializer=_init_worker,
+                initargs=(defaults.get('bank_logo'),)
+            ) as pool:
+                # At most two statements per worker are queued, so only those
+                # accounts' rows are held in memory at once
+                in_flight = {}
+                for account_number, args in jobs():
+                    if len(in_flight) >= workers * 2:
+                        completed, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in completed:
+                            _collect(future, in_flight.pop(future), finished)
+                    in_flight[pool.submit(_render_statement, *args)] = account_number
+                for future in list(in_flight):
+                    _collect(future, in_flight.pop(future), finished)
+    except Exception as e:
+        checkpoint.update({'status': 'failed', 'error': str(e), 'finished_at': datetime.utcnow().isoformat()})
+        save_checkpoint(output_dir, checkpoint)
+        raise
+
+    elapsed = time.perf_counter() - started
+    rendered = len(done) - (checkpoint['total'] - pending)
+    checkpoint.update({
+        'status': 'failed' if checkpoint['failed'] else 'done',
+        'finished_at': datetime.utcnow().isoformat(),
+        'elapsed_seconds': round(elapsed, 3),
+        'statements_per_second': round(rendered / elapsed, 2) if elapsed > 0 else 0.0,
+        'workers': workers
+    })
+    if checkpoint['failed']:
+        checkpoint['error'] = f"{len(checkpoint['failed'])} statement(s) failed; resume to retry them"
+    save_checkpoint(output_dir, checkpoint)
+    return checkpoint
+
+def _collect(future, account_number, finished):
+    try:
+        size = future.result()
+    except Exception as e:
+        finished(account_number, error=str(e))
+    else:
+        finished(account_number, size)
+
+def zip_statements(output_dir, zip_path):
+    # PDFs are already compressed, so store them rather than deflating again
+    with zipfile.ZipFile(zip_path + '.tmp', 'w', zipfile.ZIP_STORED) as archive:
+        for name in sorted(os.listdir(output_dir)):
+            if name.endswith('.pdf'):
+                archive.write(os.path.join(output_dir, name), name)
+    os.replace(zip_path + '.tmp', zip_path)
+    return zip_path
+
+def remove_statements(output_dir):
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+def _last_modified(*paths):
+    times = [os.path.getmtime(path) for path in paths if os.path.exists(path)]
+    return max(times) if times else None
+
+def purge_expired_batches(root, retention_seconds):
+    # Removes batch directories and ZIPs under root that nothing has touched for
+    # the retention period. The checkpoint is rewritten as a batch progresses,
+    # so its mtime (or the ZIP's, once written) is when the batch last did
+    # anything. Running batches are skipped. Returns the number removed.
+    cutoff = time.time() - retention_seconds
+    expired = 0
+    batch_ids = set()
+    for name in os.listdir(root):
+        batch_id = name[:-4] if name.endswith('.zip') else name
+        if BATCH_ID.fullmatch(batch_id):
+            batch_ids.add(batch_id)
+
+    for batch_id in batch_ids:
+        directory = os.path.join(root, batch_id)
+        zip_path = directory + '.zip'
+        modified = _last_modified(os.path.join(directory, CHECKPOINT_NAME), zip_path, directory)
+        if modified is None or modified >= cutoff:
+            continue
+        lock = None
+        if os.path.isdir(directory):
+            # Held while deleting, so a resume can't start on a half-removed batch
+            lock = lock_batch(directory)
+            if lock is None:
+                continue
+        try:
+            if os.path.exists(zip_path):
+                os.remove(zip_path)
+            remove_statements(directory)
+        except FileNotFoundError:
+            # Purged by another process
+            continue
+        finally:
+            if lock is not None:
+                lock.close()
+        expired += 1
+    return expired
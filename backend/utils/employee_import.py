@@ -0,0 +1,88 @@
+from datetime import datetime
+from sqlalchemy import select
+
+# Same required fields as POST /api/employees
+REQUIRED_FIELDS = ('first_name', 'last_name', 'email', 'phone', 'position', 'department', 'hire_date')
+# Columns written on import and read back on export (the CSV header)
+EMPLOYEE_COLUMNS = ('first_name', 'last_name', 'email', 'phone', 'position', 'department', 'hire_date')
+# Stop collecting row errors after this many; error_count still counts them all
+MAX_ERRORS = 1000
+
+def normalize_employee(row):
+    missing = [field for field in REQUIRED_FIELDS if not str(row.get(field) or '').strip()]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+
+    employee = {field: str(row[field]).strip() for field in EMPLOYEE_COLUMNS}
+    try:
+        employee['hire_date'] = datetime.strptime(employee['hire_date'], '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"invalid hire_date {row['hire_date']!r}")
+    if '@' not in employee['email']:
+        raise ValueError(f"invalid email {row['email']!r}")
+    return employee
+
+def _add_error(summary, errors, row_number, error, email=None):
+    summary['error_count'] += 1
+    if len(errors) < MAX_ERRORS:
+        entry = {'row': row_number, 'error': error}
+        if email:
+            entry['email'] = email
+        errors.append(entry)
+
+def _batches(rows, batch_size, summary, errors):
+    batch = []
+    for row_number, row in enumerate(rows, 1):
+        if not isinstance(row, dict):
+            _add_error(summary, errors, row_number, 'row is not an object')
+            continue
+        try:
+            batch.append((row_number, normalize_employee(row)))
+        except ValueError as e:
+            _add_error(summary, errors, row_number, str(e))
+            continue
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def import_employees(session, table, rows, batch_size=1000, skip_invalid=False):
+    # Validates and inserts in batches: one set-based email lookup and one
+    # executemany per batch, instead of a query and a commit per employee.
+    # Without skip_invalid nothing is written once any row fails (the caller
+    # must roll back); with it, good rows go in and bad ones are reported.
+    summary = {'inserted': 0, 'error_count': 0}
+    errors = []
+    # Duplicates within the file are caught case-insensitively, like MySQL's
+    # default collation treats the unique email index
+    seen = set()
+
+    for batch in _batches(rows, batch_size, summary, errors):
+        emails = [employee['email'] for _, employee in batch]
+        taken = {
+            email.lower()
+            for email in session.execute(select(table.c.email).where(table.c.email.in_(emails))).scalars()
+        }
+
+        valid = []
+        for row_number, employee in batch:
+            email = employee['email'].lower()
+            if email in taken:
+                _add_error(summary, errors, row_number, 'email already in use', employee['email'])
+            elif email in seen:
+                _add_error(summary, errors, row_number, 'duplicate email in import', employee['email'])
+            else:
+                seen.add(email)
+                valid.append(employee)
+
+        if summary['error_count'] and not skip_invalid:
+            # Keep validating the rest of the input but stop writing
+            continue
+        if valid:
+            session.execute(table.insert(), valid)
+            summary['inserted'] += len(valid)
+
+    # Field errors are found before uniqueness ones; report them in file order
+    errors.sort(key=lambda error: error['row'])
+    return summary, errors
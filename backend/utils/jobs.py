@@ -0,0 +1,193 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+import importlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+
+# Renderer per job kind as (module, function), imported in the worker on first
+# use so the web process never loads ReportLab just to queue a job
+RENDERERS = {
+    'payslip': ('.payslip_generator', 'generate_payslip_pdf'),
+    'bank_statement': ('.bank_statement_generator', 'generate_bank_statement_pdf')
+}
+
+def _renderer(kind):
+    module, name = RENDERERS[kind]
+    return getattr(importlib.import_module(module, __package__), name)
+
+# Each job's state lives in <id>.json next to its <id>.pdf in the results
+# directory, so any web worker (not just the one that queued it) can report on
+# it and serve the download
+JOB_ID = re.compile(r'[0-9a-f]{32}')
+PUBLIC_FIELDS = ('id', 'kind', 'status', 'created_at', 'finished_at', 'error', 'size')
+
+def _read_job(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def _write_job(path, job):
+    # Written next to its final name and moved into place, so readers never see
+    # half a file; the temporary name is per process as workers write it too
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'w') as f:
+        json.dump(job, f)
+    os.replace(temporary, path)
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _render_job(kind, data, path, status_path):
+    # Runs in a worker process; the PDF goes straight to disk so only its size comes back
+    job = _read_job(status_path)
+    if job is not None:
+        job['status'] = 'running'
+        _write_job(status_path, job)
+    pdf_bytes = _renderer(kind)(data).getvalue()
+    with open(path, 'wb') as f:
+        f.write(pdf_bytes)
+    return len(pdf_bytes)
+
+class JobQueue:
+    def __init__(self, workers=None, results_dir=None, retention_seconds=3600):
+        self.workers = workers or os.cpu_count() or 1
+        self.results_dir = results_dir or os.path.join(tempfile.gettempdir(), 'payslip_jobs')
+        self.retention_seconds = retention_seconds
+        os.makedirs(self.results_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _executor(self, broken=None):
+        # Started on first submit so importing the app never forks. A pool that
+        # lost a worker (killed for memory, say) has shut itself down and rejects
+        # all further work, so pass it as broken to have it replaced.
+        with self._lock:
+            if broken is not None and self._pool is broken:
+                self._pool = None
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _paths(self, job_id):
+        return os.path.join(self.results_dir, f"{job_id}.pdf"), os.path.join(self.results_dir, f"{job_id}.json")
+
+    def submit(self, kind, data, download_name=None):
+        if kind not in RENDERERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        self.purge_expired()
+
+        job_id = uuid.uuid4().hex
+        path, status_path = self._paths(job_id)
+        job = {
+            'id': job_id,
+            'kind': kind,
+            'status': 'queued',
+            'created_at': datetime.utcnow().isoformat(),
+            'finished_at': None,
+            'error': None,
+            'size': None,
+            'download_name': download_name or f"{kind}_{job_id}.pdf",
+            # The process whose pool runs the job; if it exits first, so do its workers
+            'pid': os.getpid()
+        }
+        _write_job(status_path, job)
+
+        pool = self._executor()
+        try:
+            future = pool.submit(_render_job, kind, data, path, status_path)
+        except BrokenProcessPool:
+            pool = self._executor(broken=pool)
+            future = pool.submit(_render_job, kind, data, path, status_path)
+        future.add_done_callback(lambda f: self._finish(job, status_path, pool, f))
+        return self.get(job_id)
+
+    def _finish(self, job, status_path, pool, future):
+        error = future.exception()
+        if error is None:
+            job.update({'status': 'done', 'size': future.result()})
+        else:
+            job.update({'status': 'failed', 'error': str(error) or type(error).__name__})
+            if isinstance(error, BrokenProcessPool):
+                self._executor(broken=pool)
+        job['finished_at'] = datetime.utcnow().isoformat()
+        _write_job(status_path, job)
+
+    def _load(self, job_id):
+        if not JOB_ID.fullmatch(job_id):
+            return None
+        job = _read_job(self._paths(job_id)[1])
+        if job is not None and job['status'] in ('queued', 'running') and not _alive(job['pid']):
+            job.update({'status': 'failed', 'error': 'The process running this job exited before it finished'})
+        return job
+
+    def get(self, job_id):
+        job = self._load(job_id)
+        if job is None:
+            return None
+        return {field: job[field] for field in PUBLIC_FIELDS}
+
+    def result(self, job_id):
+        # (path, download name) for a finished job, otherwise None
+        job = self._load(job_id)
+        if job is None or job['status'] != 'done':
+            return None
+        return self._paths(job_id)[0], job['download_name']
+
+    def purge_expired(self):
+        # Status files are rewritten on every change, so one untouched for the
+        # retention period belongs to a job that finished (or was lost) that long ago
+        cutoff = time.time() - self.retention_seconds
+        expired = 0
+        for name in os.listdir(self.results_dir):
+            job_id, extension = os.path.splitext(name)
+            if extension != '.json' or not JOB_ID.fullmatch(job_id):
+                continue
+            path, status_path = self._paths(job_id)
+            try:
+                if os.path.getmtime(status_path) >= cutoff:
+                    continue
+                os.remove(status_path)
+            except FileNotFoundError:
+                # Purged by another process
+                continue
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            expired += 1
+        return expired
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+_queue_lock = threading.Lock()
+
+def get_job_queue(app):
+    # One queue per Flask app, configured from JOB_WORKERS / JOB_RESULTS_DIR / JOB_RETENTION_SECONDS
+    with _queue_lock:
+        queue = app.extensions.get('pdf_jobs')
+        if queue is None:
+            queue = app.extensions['pdf_jobs'] = JobQueue(
+                workers=app.config.get('JOB_WORKERS'),
+                results_dir=app.config.get('JOB_RESULTS_DIR'),
+                retention_seconds=app.config.get('JOB_RETENTION_SECONDS', 3600)
+            )
+        return queue
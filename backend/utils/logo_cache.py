@@ -0,0 +1,98 @@
+from collections import OrderedDict
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Flowable
+from PIL import Image as PILImage
+import base64
+import hashlib
+import io
+import threading
+
+# Both payslips and statements draw their logo into a 2 x 1 inch box
+LOGO_SIZE = (2*inch, 1*inch)
+# Pixels per point kept when pre-scaling (2 = 144 dpi, sharp enough for print)
+LOGO_SCALE = 2
+MAX_ENTRIES = 32
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+class CachedLogo(Flowable):
+    # Draws an already decoded image; cheap to create once per document
+    def __init__(self, reader, width, height, hAlign='CENTER'):
+        Flowable.__init__(self)
+        self.reader = reader
+        self.width = width
+        self.height = height
+        self.hAlign = hAlign
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        self.canv.drawImage(self.reader, 0, 0, self.width, self.height, mask='auto')
+
+def _cache_key(data_url, width, height):
+    digest = hashlib.sha1(data_url.encode('utf-8')).hexdigest()
+    return digest, round(width, 2), round(height, 2)
+
+def _decode(data_url, width, height):
+    logo_data = base64.b64decode(data_url.split(',')[1])
+    image = PILImage.open(io.BytesIO(logo_data))
+    image.load()
+
+    # The logo is stretched into the box anyway, so never keep more pixels than it needs
+    target = (int(width * LOGO_SCALE), int(height * LOGO_SCALE))
+    if image.size[0] > target[0] or image.size[1] > target[1]:
+        image = image.resize(target, PILImage.LANCZOS)
+
+    reader = ImageReader(image)
+    # Decode to raw RGB now so the first render doesn't pay for it
+    reader.getRGBData()
+    return reader
+
+def get_logo_reader(data_url, width=LOGO_SIZE[0], height=LOGO_SIZE[1]):
+    key = _cache_key(data_url, width, height)
+    with _lock:
+        reader = _cache.get(key)
+        if reader is not None:
+            _cache.move_to_end(key)
+            _stats['hits'] += 1
+            return reader
+        _stats['misses'] += 1
+
+    reader = _decode(data_url, width, height)
+    with _lock:
+        _cache[key] = reader
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return reader
+
+def get_logo(data_url, width=LOGO_SIZE[0], height=LOGO_SIZE[1]):
+    return CachedLogo(get_logo_reader(data_url, width, height), width, height)
+
+def warm_logo_cache(*data_urls):
+    for data_url in data_urls:
+        if not data_url:
+            continue
+        try:
+            get_logo_reader(data_url)
+        except Exception as e:
+            print(f"Could not pre-load logo: {str(e)}")
+
+def logo_cache_stats():
+    with _lock:
+        return {
+            'hits': _stats['hits'],
+            'misses': _stats['misses'],
+            'size': len(_cache),
+            'max_size': MAX_ENTRIES
+        }
+
+def clear_logo_cache():
+    with _lock:
+        _cache.clear()
+        _stats['hits'] = 0
+        _stats['misses'] = 0
@@ -0,0 +1,169 @@
+from flask import g, has_request_context, request
+import threading
+import time
+
+# Process-wide counters and histograms, served in the Prometheus text format by
+# GET /metrics. Off by default (METRICS_ENABLED): every helper then returns on
+# its first check and stage() hands back one shared no-op context manager, so
+# the instrumented hot paths pay a function call and nothing more.
+#
+# Renders inside job / payroll worker processes are not collected; only work
+# done in the web process is.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BYTES_BUCKETS = (4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+ROWS_BUCKETS = (0, 10, 100, 1000, 10000, 100000, 1000000)
+
+# name -> (type, help, buckets)
+METRICS = {
+    'payslip_http_request_seconds': ('histogram', 'Request latency by endpoint', LATENCY_BUCKETS),
+    'payslip_render_stage_seconds': ('histogram', 'Time spent in each document render stage', LATENCY_BUCKETS),
+    'payslip_db_query_seconds': ('histogram', 'Database statement latency by endpoint', LATENCY_BUCKETS),
+    'payslip_pdf_bytes': ('histogram', 'Size of rendered PDFs', BYTES_BUCKETS),
+    'payslip_statement_rows': ('histogram', 'Transaction rows per rendered statement', ROWS_BUCKETS),
+    'payslip_render_cache_total': ('counter', 'Render cache lookups by result', None),
+}
+
+_enabled = False
+_lock = threading.Lock()
+# name -> {label tuple: [bucket counts..., sum, count]} or {label tuple: value}
+_series = {name: {} for name in METRICS}
+
+def configure(enabled):
+    global _enabled
+    _enabled = bool(enabled)
+
+def enabled():
+    return _enabled
+
+def observe(name, value, **labels):
+    if not _enabled:
+        return
+    buckets = METRICS[name][2]
+    key = tuple(sorted(labels.items()))
+    with _lock:
+        series = _series[name].get(key)
+        if series is None:
+            series = _series[name][key] = [0] * (len(buckets) + 2)
+        for index, bound in enumerate(buckets):
+            if value <= bound:
+                series[index] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+def increment(name, amount=1, **labels):
+    if not _enabled:
+        return
+    key = tuple(sorted(labels.items()))
+    with _lock:
+        _series[name][key] = _series[name].get(key, 0) + amount
+
+class _Stage:
+    __slots__ = ('labels', 'started')
+
+    def __init__(self, labels):
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe('payslip_render_stage_seconds', time.perf_counter() - self.started, **self.labels)
+        return False
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_STAGE = _NoStage()
+
+def stage(document, name):
+    # with stage('payslip', 'build'): doc.build(...)
+    if not _enabled:
+        return _NO_STAGE
+    return _Stage({'document': document, 'stage': name})
+
+def reset():
+    with _lock:
+        for series in _series.values():
+            series.clear()
+
+def _label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+def render_prometheus():
+    lines = []
+    with _lock:
+        snapshot = {name: {key: list(value) if isinstance(value, list) else value
+                           for key, value in series.items()}
+                    for name, series in _series.items()}
+
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(snapshot[name].items()):
+            if kind == 'counter':
+                lines.append(f'{name}{_label_text(labels)} {value}')
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, value):
+                cumulative += count
+                lines.append(f'{name}_bucket{_label_text(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_bucket{_label_text(labels, [("le", "+Inf")])} {value[-1]}')
+            lines.append(f'{name}_sum{_label_text(labels)} {value[-2]:.6f}')
+            lines.append(f'{name}_count{_label_text(labels)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
+
+def init_metrics(app):
+    # Request latency per endpoint and DB statement latency per endpoint. The
+    # hooks are only installed when metrics are on.
+    configure(app.config.get('METRICS_ENABLED', False))
+    if not _enabled:
+        return
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            observe(
+                'payslip_http_request_seconds',
+                time.perf_counter() - started,
+                endpoint=request.endpoint or 'unknown',
+                method=request.method,
+                status=response.status_code
+            )
+        return response
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_execute)
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('metrics_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    # Statements issued outside a request (CLI commands, setup) are labelled "none"
+    endpoint = (request.endpoint or 'unknown') if has_request_context() else 'none'
+    observe('payslip_db_query_seconds', elapsed, endpoint=endpoint)
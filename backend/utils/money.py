@@ -0,0 +1,124 @@
+from array import array
+from decimal import Decimal, DecimalException, ROUND_HALF_UP
+from itertools import repeat
+from math import isfinite
+from operator import mul, truediv
+
+# Minor-unit digits per ISO 4217 currency; anything unlisted uses 2
+CURRENCY_EXPONENTS = {
+    'KES': 2,
+    'USD': 2,
+    'EUR': 2,
+    'GBP': 2,
+    'JPY': 0,
+    'UGX': 0,
+    'KWD': 3,
+    'BHD': 3
+}
+DEFAULT_EXPONENT = 2
+# Below this many minor units a float is always within half a minor unit of the
+# exact amount, so float division and formatting round back to the same digits
+MAX_EXACT = 10 ** 15
+_ONE = Decimal(1)
+
+def currency_exponent(currency):
+    return CURRENCY_EXPONENTS.get((currency or '').upper(), DEFAULT_EXPONENT)
+
+def _float_minor(value, scale):
+    # If the nearest float to minor/scale is this value, it meant exactly that
+    minor = round(value * scale)
+    if minor / scale == value and -MAX_EXACT < minor < MAX_EXACT:
+        return minor
+    return None
+
+def _invalid(value):
+    return ValueError(f"invalid amount {value!r}")
+
+def to_minor(value, exponent=DEFAULT_EXPONENT):
+    # Amount -> integer minor units (cents), rounding half up. Zero, ints, Decimals
+    # and floats or strings with at most `exponent` decimals avoid Decimal
+    # arithmetic entirely; everything else goes through it. Anything that is not
+    # a finite number raises ValueError.
+    if not value:
+        return 0
+    scale = 10 ** exponent
+    kind = type(value)
+    if kind is int:
+        return value * scale
+    if kind is Decimal:
+        if not value.is_finite():
+            raise _invalid(value)
+        # as_integer_ratio() would build a huge integer for a huge exponent
+        if value.adjusted() < 18:
+            numerator, denominator = value.as_integer_ratio()
+            if scale % denominator == 0:
+                return numerator * (scale // denominator)
+    elif kind is float:
+        if not isfinite(value):
+            raise _invalid(value)
+        minor = _float_minor(value, scale)
+        if minor is not None:
+            return minor
+        # repr() is the shortest string that round-trips, so 0.285 stays "0.285"
+        value = repr(value)
+    elif kind is str:
+        try:
+            minor = _float_minor(float(value), scale)
+        except (ValueError, OverflowError):
+            minor = None
+        if minor is not None:
+            return minor
+        value = value.strip()
+    try:
+        amount = Decimal(value)
+        if amount.is_finite():
+            # Raises InvalidOperation past 28 significant digits
+            return int(amount.scaleb(exponent).quantize(_ONE, rounding=ROUND_HALF_UP))
+    except (DecimalException, TypeError, ValueError):
+        pass
+    raise _invalid(value)
+
+def minor_array(values, exponent=DEFAULT_EXPONENT):
+    # A whole column at once into an int64 array. When every value is a number
+    # (or numeric string) on a whole minor unit, which statements nearly always
+    # are, the column converts in a few C-level passes with the same exactness
+    # check as _float_minor(); otherwise each value goes through to_minor()
+    if not isinstance(values, list):
+        values = list(values)
+    scale = 10 ** exponent
+    try:
+        floats = list(map(float, values))
+        minors = list(map(round, map(mul, floats, repeat(scale))))
+    except (TypeError, ValueError, OverflowError):
+        minors = None
+    if (minors and list(map(truediv, minors, repeat(scale))) == floats
+            and -MAX_EXACT < min(minors) and max(minors) < MAX_EXACT):
+        return array('q', minors)
+    return int64_array([to_minor(value, exponent) for value in values])
+
+def int64_array(minors):
+    # Amounts past the int64 range (about 92 quadrillion at two decimals) are
+    # refused as invalid rather than surfacing as OverflowError
+    try:
+        return array('q', minors)
+    except OverflowError:
+        raise ValueError("amount out of range")
+
+def to_decimal(minor, exponent=DEFAULT_EXPONENT):
+    # Exact value for the database and other Decimal edges
+    return Decimal(minor).scaleb(-exponent)
+
+def format_minor(minor, exponent=DEFAULT_EXPONENT):
+    # "1,234.50" from integer minor units; exact digits for any size of amount
+    if -MAX_EXACT < minor < MAX_EXACT:
+        return f"{minor / 10 ** exponent:,.{exponent}f}"
+    sign = '-' if minor < 0 else ''
+    whole, frac = divmod(abs(minor), 10 ** exponent)
+    if exponent:
+        return f"{sign}{whole:,}.{frac:0{exponent}d}"
+    return f"{sign}{whole:,}"
+
+def format_money(minor, currency, exponent=None):
+    if exponent is None:
+        exponent = currency_exponent(currency)
+    return f"{currency} {format_minor(minor, exponent)}"
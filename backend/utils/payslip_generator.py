@@ -3,34 +3,49 @@ from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import inch, cm
 from reportlab.graphics.shapes import Line, Drawing
-from .pdf_styles import get_payslip_styles, PAYSLIP_COLORS
+from .logo_cache import get_logo
+from .metrics import observe, stage
+from .money import currency_exponent, format_money, to_minor
+from .pdf_styles import footer_timestamp, get_payslip_styles, get_payslip_table_styles
 import io
 import base64
 from datetime import datetime
 
-def generate_payslip_pdf(data):
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=72,
-        leftMargin=72,
-        topMargin=72,
-        bottomMargin=72
-    )
-    
-    # Get styles
-    styles = get_payslip_styles()
+def payslip_fields(data, generated_at):
+    # Everything on a payslip that changes from one employee to the next, as display text
+    currency = data.get('currency', 'KES')
+    exponent = currency_exponent(currency)
+    basic_salary = to_minor(data.get('basicSalary', 0), exponent)
+    allowances = to_minor(data.get('allowances', 0), exponent)
+    deductions = to_minor(data.get('deductions', 0), exponent)
+    net_salary = basic_salary + allowances - deductions
+
+    return {
+        'period': f"Period: {data.get('month', '')}",
+        'employeeName': str(data.get('employeeName', '')),
+        'employeeId': str(data.get('employeeId', '')),
+        'position': str(data.get('position', '')),
+        'basicSalary': format_money(basic_salary, currency, exponent),
+        'allowances': format_money(allowances, currency, exponent),
+        'deductions': format_money(deductions, currency, exponent),
+        'netSalary': format_money(net_salary, currency, exponent),
+        'footer': f"Generated on {generated_at.strftime('%Y-%m-%d %H:%M:%S')}"
+    }
+
+def payslip_elements(data, fields, line=Paragraph):
+    # The payslip's flowables. Only company_name and company_logo are read from
+    # data; the rest comes from fields, and line(text, style) builds the one-line
+    # paragraphs (period and footer) that hold field text.
+    with stage('payslip', 'styles'):
+        styles = get_payslip_styles()
+        table_styles = get_payslip_table_styles()
     elements = []
     
     # Add company logo if available
     if data.get('company_logo'):
         try:
-            logo_data = base64.b64decode(data['company_logo'].split(',')[1])
-            logo_buffer = io.BytesIO(logo_data)
-            logo = Image(logo_buffer, width=2*inch, height=1*inch)
-            logo.hAlign = 'CENTER'
-            elements.append(logo)
+            with stage('payslip', 'logo'):
+                elements.append(get_logo(data['company_logo']))
             elements.append(Spacer(1, 20))
         except:
             pass
@@ -40,26 +55,19 @@ def generate_payslip_pdf(data):
     elements.append(Paragraph('PAYSLIP', styles['PayslipHeader']))
     
     # Add period
-    elements.append(Paragraph(f"Period: {data.get('month', '')}", styles['CompanyInfo']))
+    elements.append(line(fields['period'], styles['CompanyInfo']))
     
     # Add employee information
     employee_data = [
-        ['Employee Name:', data.get('employeeName', '')],
-        ['Employee ID:', data.get('employeeId', '')],
-        ['Position:', data.get('position', '')]
+        ['Employee Name:', fields['employeeName']],
+        ['Employee ID:', fields['employeeId']],
+        ['Position:', fields['position']]
     ]
     
     employee_table = Table(
         employee_data,
         colWidths=[2*inch, 4*inch],
-        style=TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('TEXTCOLOR', (0, 0), (-1, -1), PAYSLIP_COLORS['text']),
-            ('GRID', (0, 0), (-1, -1), 0.25, colors.white),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ])
+        style=table_styles['employee']
     )
     elements.append(employee_table)
     elements.append(Spacer(1, 20))
@@ -69,23 +77,14 @@ def generate_payslip_pdf(data):
     
     earnings_data = [
         ['Description', 'Amount'],
-        ['Basic Salary', f"{data.get('currency', 'KES')} {data.get('basicSalary', 0):,.2f}"],
-        ['Allowances', f"{data.get('currency', 'KES')} {data.get('allowances', 0):,.2f}"]
+        ['Basic Salary', fields['basicSalary']],
+        ['Allowances', fields['allowances']]
     ]
     
     earnings_table = Table(
         earnings_data,
         colWidths=[4*inch, 2*inch],
-        style=TableStyle([
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('TEXTCOLOR', (0, 0), (-1, 0), PAYSLIP_COLORS['header']),
-            ('BACKGROUND', (0, 0), (-1, 0), PAYSLIP_COLORS['table_header']),
-            ('GRID', (0, 0), (-1, -1), 0.25, PAYSLIP_COLORS['text']),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [PAYSLIP_COLORS['table_row_odd'], PAYSLIP_COLORS['table_row_even']]),
-        ])
+        style=table_styles['earnings']
     )
     elements.append(earnings_table)
     elements.append(Spacer(1, 20))
@@ -95,56 +94,56 @@ def generate_payslip_pdf(data):
     
     deductions_data = [
         ['Description', 'Amount'],
-        ['Deductions', f"{data.get('currency', 'KES')} {data.get('deductions', 0):,.2f}"]
+        ['Deductions', fields['deductions']]
     ]
     
     deductions_table = Table(
         deductions_data,
         colWidths=[4*inch, 2*inch],
-        style=TableStyle([
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('TEXTCOLOR', (0, 0), (-1, 0), PAYSLIP_COLORS['header']),
-            ('BACKGROUND', (0, 0), (-1, 0), PAYSLIP_COLORS['table_header']),
-            ('GRID', (0, 0), (-1, -1), 0.25, PAYSLIP_COLORS['text']),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [PAYSLIP_COLORS['table_row_odd'], PAYSLIP_COLORS['table_row_even']]),
-        ])
+        style=table_styles['deductions']
     )
     elements.append(deductions_table)
     elements.append(Spacer(1, 20))
     
-    # Calculate net salary
-    basic_salary = float(data.get('basicSalary', 0))
-    allowances = float(data.get('allowances', 0))
-    deductions = float(data.get('deductions', 0))
-    net_salary = basic_salary + allowances - deductions
-    
     # Add total section
     total_data = [
-        ['', 'Net Salary:', f"{data.get('currency', 'KES')} {net_salary:,.2f}"]
+        ['', 'Net Salary:', fields['netSalary']]
     ]
     
     total_table = Table(
         total_data,
         colWidths=[3*inch, 1.5*inch, 1.5*inch],
-        style=TableStyle([
-            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 12),
-            ('TEXTCOLOR', (-1, -1), (-1, -1), PAYSLIP_COLORS['total']),
-            ('GRID', (0, 0), (-1, -1), 0.25, colors.white),
-        ])
+        style=table_styles['total']
     )
     elements.append(total_table)
     
     # Add footer
     elements.append(Spacer(1, 40))
-    footer_text = f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-    elements.append(Paragraph(footer_text, styles['CompanyInfo']))
+    elements.append(line(fields['footer'], styles['CompanyInfo']))
+    return elements
+
+def payslip_document(buffer, invariant):
+    return SimpleDocTemplate(
+        buffer,
+        invariant=invariant,
+        pagesize=A4,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=72
+    )
+
+def generate_payslip_pdf(data):
+    generated_at, invariant = footer_timestamp(data)
+    buffer = io.BytesIO()
+    doc = payslip_document(buffer, invariant)
+    with stage('payslip', 'fields'):
+        fields = payslip_fields(data, generated_at)
+    elements = payslip_elements(data, fields)
     
     # Build PDF
-    doc.build(elements)
+    with stage('payslip', 'build'):
+        doc.build(elements)
+    observe('payslip_pdf_bytes', buffer.tell(), document='payslip')
     buffer.seek(0)
     return buffer
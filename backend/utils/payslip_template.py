@@ -0,0 +1,242 @@
+from collections import OrderedDict
+from reportlab import Version as REPORTLAB_VERSION
+from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Flowable, PageBreak
+from .metrics import observe, stage
+from .payslip_generator import generate_payslip_pdf, payslip_document, payslip_elements, payslip_fields
+from .pdf_styles import footer_timestamp, styles_version
+import hashlib
+import io
+import threading
+
+# Field text is swapped for these markers while the static page is laid out
+FIELD_MARKER = '\x00'
+MAX_TEMPLATES = 16
+
+_templates = OrderedDict()
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+def _replay_supported():
+    # Recording and replaying a page goes through Canvas internals: the _code
+    # list of content-stream operators and the document's fontMapping /
+    # getInternalFontName. They are private, so check they are still there (they
+    # are in the versions in requirements.txt) rather than trust the version.
+    c = canvas.Canvas(io.BytesIO())
+    doc = getattr(c, '_doc', None)
+    return (isinstance(getattr(c, '_code', None), list)
+            and isinstance(getattr(doc, 'fontMapping', None), dict)
+            and callable(getattr(doc, 'getInternalFontName', None)))
+
+REPLAY_SUPPORTED = _replay_supported()
+if not REPLAY_SUPPORTED:
+    print(f"ReportLab {REPORTLAB_VERSION} lacks the canvas internals payslip templates use; "
+          f"payslips will use the full render")
+
+def _marker(field):
+    return f"{FIELD_MARKER}{field}{FIELD_MARKER}"
+
+class _FieldLine(Flowable):
+    # Stands in for a one-line Paragraph whose text varies per employee: same
+    # height, spacing and baseline, drawn with a single draw*String call
+    def __init__(self, text, style):
+        Flowable.__init__(self)
+        self.text = text
+        self.style = style
+
+    def wrap(self, availWidth, availHeight):
+        self.width = availWidth
+        return availWidth, self.style.leading
+
+    def getSpaceBefore(self):
+        return self.style.spaceBefore
+
+    def getSpaceAfter(self):
+        return self.style.spaceAfter
+
+    def draw(self):
+        style = self.style
+        self.canv.setFillColor(style.textColor)
+        self.canv.setFont(style.fontName, style.fontSize, style.leading)
+        # Where a single-line Paragraph puts its baseline
+        y = style.leading - style.fontSize
+        if style.alignment == TA_CENTER:
+            self.canv.drawCentredString(self.width / 2, y, self.text)
+        elif style.alignment == TA_RIGHT:
+            self.canv.drawRightString(self.width, y, self.text)
+        else:
+            self.canv.drawString(0, y, self.text)
+
+class _RecordingCanvas(canvas.Canvas):
+    # Draws the static page as usual but notes where in the page's content stream
+    # each call that touches document resources (fonts, images) landed, and skips
+    # marker text entirely, noting its position instead
+    def __init__(self, *args, **kwargs):
+        canvas.Canvas.__init__(self, *args, **kwargs)
+        self.calls = []
+        self.pages = []
+
+    def _record(self, name, args, kwargs):
+        start = len(self._code)
+        getattr(canvas.Canvas, name)(self, *args, **kwargs)
+        self.calls.append((start, len(self._code), name, args, kwargs, None))
+
+    def setFont(self, *args, **kwargs):
+        self._record('setFont', args, kwargs)
+
+    def drawImage(self, *args, **kwargs):
+        self._record('drawImage', args, kwargs)
+
+    def _text(self, name, x, y, text, args, kwargs):
+        if text.startswith(FIELD_MARKER):
+            at = len(self._code)
+            self.calls.append((at, at, name, (x, y), kwargs, text.strip(FIELD_MARKER)))
+        else:
+            getattr(canvas.Canvas, name)(self, x, y, text, *args, **kwargs)
+
+    def drawString(self, x, y, text, *args, **kwargs):
+        self._text('drawString', x, y, text, args, kwargs)
+
+    def drawRightString(self, x, y, text, *args, **kwargs):
+        self._text('drawRightString', x, y, text, args, kwargs)
+
+    def drawCentredString(self, x, y, text, *args, **kwargs):
+        self._text('drawCentredString', x, y, text, args, kwargs)
+
+    def showPage(self):
+        fonts = sorted(self._doc.fontMapping, key=lambda name: int(self._doc.fontMapping[name][2:]))
+        self.pages.append((list(self._code), self.calls, fonts))
+        self.calls = []
+        canvas.Canvas.showPage(self)
+
+class PayslipTemplate:
+    # A payslip page with every employee field left blank, laid out once. draw()
+    # replays its content stream onto a fresh canvas and fills in the fields, so
+    # per-employee rendering skips the platypus layout entirely.
+    def __init__(self, data):
+        # Callers fall back to the full render on ValueError
+        if not REPLAY_SUPPORTED:
+            raise ValueError(f"Payslip templates are not supported on ReportLab {REPORTLAB_VERSION}")
+        fields = {name: _marker(name) for name in payslip_fields(data, footer_timestamp(data)[0])}
+        doc = payslip_document(io.BytesIO(), invariant=True)
+        doc.build(payslip_elements(data, fields, line=_FieldLine), canvasmaker=_RecordingCanvas)
+        pages = doc.canv.pages
+        if len(pages) != 1:
+            raise ValueError('Payslip layout does not fit on one page')
+        self.code, self.calls, self.fonts = pages[0]
+
+    def draw(self, c, fields):
+        # Same internal font names as the recorded stream refers to
+        for name in self.fonts:
+            c._doc.getInternalFontName(name)
+
+        code = c._code
+        position = 0
+        for start, end, name, args, kwargs, field in self.calls:
+            code.extend(self.code[position:start])
+            position = end
+            if field is None:
+                getattr(c, name)(*args, **kwargs)
+            else:
+                getattr(c, name)(*args, fields[field], **kwargs)
+        code.extend(self.code[position:])
+
+def _template_key(data):
+    # Everything a payslip reads from data besides the per-employee fields
+    logo = data.get('company_logo') or ''
+    return (
+        data.get('company_name', 'Company Name'),
+        hashlib.sha1(logo.encode('utf-8')).hexdigest(),
+        styles_version()
+    )
+
+def get_payslip_template(data):
+    key = _template_key(data)
+    with _lock:
+        template = _templates.get(key)
+        if template is not None:
+            _templates.move_to_end(key)
+            _stats['hits'] += 1
+            return template
+        _stats['misses'] += 1
+
+    template = PayslipTemplate(data)
+    with _lock:
+        _templates[key] = template
+        _templates.move_to_end(key)
+        while len(_templates) > MAX_TEMPLATES:
+            _templates.popitem(last=False)
+    return template
+
+def template_cache_stats():
+    with _lock:
+        return dict(_stats, entries=len(_templates))
+
+def clear_payslip_templates():
+    with _lock:
+        _templates.clear()
+
+def generate_payslip_pdf_from_template(data):
+    # Same page as generate_payslip_pdf(), built from the company's cached template
+    try:
+        with stage('payslip_template', 'template'):
+            template = get_payslip_template(data)
+    except ValueError:
+        return generate_payslip_pdf(data)
+
+    generated_at, invariant = footer_timestamp(data)
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4, invariant=invariant)
+    with stage('payslip_template', 'fields'):
+        fields = payslip_fields(data, generated_at)
+    with stage('payslip_template', 'build'):
+        template.draw(c, fields)
+        c.showPage()
+        c.save()
+    observe('payslip_pdf_bytes', buffer.tell(), document='payslip_template')
+    buffer.seek(0)
+    return buffer
+
+def generate_combined_payslips_pdf(payloads):
+    # Every payslip as one page of a single document. Pages are replayed from the
+    # company's template onto one canvas, so the fonts and the logo are written
+    # once and shared by every page: ReportLab stores a drawn image as a form
+    # XObject named by its digest and reuses it for each later drawImage.
+    payloads = list(payloads)
+    if not payloads:
+        raise ValueError('No payslips to render')
+    try:
+        with stage('payslip_combined', 'template'):
+            templates = [get_payslip_template(data) for data in payloads]
+    except ValueError:
+        return _combined_from_flowables(payloads)
+
+    invariant = footer_timestamp(payloads[0])[1]
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4, invariant=invariant)
+    with stage('payslip_combined', 'build'):
+        for template, data in zip(templates, payloads):
+            template.draw(c, payslip_fields(data, footer_timestamp(data)[0]))
+            c.showPage()
+        c.save()
+    observe('payslip_pdf_bytes', buffer.tell(), document='payslip_combined')
+    buffer.seek(0)
+    return buffer
+
+def _combined_from_flowables(payloads):
+    # Layouts too long for a template: one platypus document, a page break
+    # between employees
+    buffer = io.BytesIO()
+    doc = payslip_document(buffer, footer_timestamp(payloads[0])[1])
+    elements = []
+    for data in payloads:
+        if elements:
+            elements.append(PageBreak())
+        elements.extend(payslip_elements(data, payslip_fields(data, footer_timestamp(data)[0])))
+    with stage('payslip_combined', 'build'):
+        doc.build(elements)
+    observe('payslip_pdf_bytes', buffer.tell(), document='payslip_combined')
+    buffer.seek(0)
+    return buffer
@@ -1,6 +1,8 @@
 from reportlab.lib import colors
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER
+from reportlab.platypus import TableStyle
+from datetime import datetime
 
 # Color schemes
 PAYSLIP_COLORS = {
@@ -26,7 +28,46 @@ BANK_STATEMENT_COLORS = {
     'table_row_odd': colors.white
 }
 
+def footer_timestamp(data):
+    # A caller-supplied generated_at pins the footer; generators then also build
+    # with invariant=1 so identical input gives a byte-identical PDF
+    generated_at = data.get('generated_at')
+    if generated_at:
+        return datetime.fromisoformat(generated_at), True
+    return datetime.now(), False
+
+# Built stylesheets and table styles, shared by every document in this process.
+# Call invalidate_styles() after changing any of the definitions in this module.
+_registry = {}
+_styles_version = 1
+
+def styles_version():
+    return _styles_version
+
+def invalidate_styles():
+    global _styles_version
+    _registry.clear()
+    _styles_version += 1
+
+def _cached(name, build):
+    styles = _registry.get(name)
+    if styles is None:
+        styles = _registry[name] = build()
+    return styles
+
 def get_payslip_styles():
+    return _cached('payslip', _build_payslip_styles)
+
+def get_bank_statement_styles():
+    return _cached('bank_statement', _build_bank_statement_styles)
+
+def get_payslip_table_styles():
+    return _cached('payslip_tables', _build_payslip_table_styles)
+
+def get_bank_statement_table_styles():
+    return _cached('bank_statement_tables', _build_bank_statement_table_styles)
+
+def _build_payslip_styles():
     styles = getSampleStyleSheet()
     
     # Header style
@@ -80,7 +121,7 @@ def get_payslip_styles():
     
     return styles
 
-def get_bank_statement_styles():
+def _build_bank_statement_styles():
     styles = getSampleStyleSheet()
     
     # Header style
@@ -142,3 +183,89 @@ def get_bank_statement_styles():
     ))
     
     return styles
+
+def _build_payslip_table_styles():
+    # Earnings and deductions tables share one look
+    amounts = TableStyle([
+        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 11),
+        ('TEXTCOLOR', (0, 0), (-1, 0), PAYSLIP_COLORS['header']),
+        ('BACKGROUND', (0, 0), (-1, 0), PAYSLIP_COLORS['table_header']),
+        ('GRID', (0, 0), (-1, -1), 0.25, PAYSLIP_COLORS['text']),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [PAYSLIP_COLORS['table_row_odd'], PAYSLIP_COLORS['table_row_even']]),
+    ])
+
+    return {
+        'employee': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('TEXTCOLOR', (0, 0), (-1, -1), PAYSLIP_COLORS['text']),
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.white),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ]),
+        'earnings': amounts,
+        'deductions': amounts,
+        'total': TableStyle([
+            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 12),
+            ('TEXTCOLOR', (-1, -1), (-1, -1), PAYSLIP_COLORS['total']),
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.white),
+        ]),
+    }
+
+def _build_bank_statement_table_styles():
+    return {
+        'account': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('TEXTCOLOR', (0, 0), (-1, -1), BANK_STATEMENT_COLORS['text']),
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.white),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ]),
+        'opening_balance': TableStyle([
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('TEXTCOLOR', (0, 0), (-1, -1), BANK_STATEMENT_COLORS['balance']),
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.white),
+        ]),
+        'transactions': TableStyle([
+            # Header style
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('TEXTCOLOR', (0, 0), (-1, 0), BANK_STATEMENT_COLORS['header']),
+            ('BACKGROUND', (0, 0), (-1, 0), BANK_STATEMENT_COLORS['table_header']),
+
+            # Data alignment
+            ('ALIGN', (0, 1), (0, -1), 'CENTER'),  # No.
+            ('ALIGN', (1, 1), (1, -1), 'LEFT'),    # Date
+            ('ALIGN', (2, 1), (2, -1), 'LEFT'),    # Transaction ID
+            ('ALIGN', (3, 1), (3, -1), 'LEFT'),    # Description
+            ('ALIGN', (4, 1), (-1, -1), 'RIGHT'),  # Amounts
+
+            # Fonts and colors
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('TEXTCOLOR', (4, 1), (4, -1), BANK_STATEMENT_COLORS['credit']),  # Money In
+            ('TEXTCOLOR', (5, 1), (5, -1), BANK_STATEMENT_COLORS['debit']),   # Money Out
+            ('TEXTCOLOR', (6, 1), (6, -1), BANK_STATEMENT_COLORS['balance']), # Balance
+
+            # Grid
+            ('GRID', (0, 0), (-1, -1), 0.25, BANK_STATEMENT_COLORS['text']),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [BANK_STATEMENT_COLORS['table_row_odd'], BANK_STATEMENT_COLORS['table_row_even']]),
+        ]),
+        'closing_balance': TableStyle([
+            ('ALIGN', (-2, -1), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (-2, -1), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (-2, -1), (-1, -1), 10),
+            ('TEXTCOLOR', (-1, -1), (-1, -1), BANK_STATEMENT_COLORS['balance']),
+            ('GRID', (0, 0), (-1, -1), 0.25, colors.white),
+        ]),
+    }
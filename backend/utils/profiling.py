@@ -0,0 +1,174 @@
+from flask import g, request
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+
+# Opt-in profiling of a single request. With PROFILING_ENABLED set, a request
+# carrying `X-Profile: cpu`, `memory` or `cpu,memory` (or ?_profile=cpu,memory)
+# runs under cProfile and/or tracemalloc. The request must also send
+# PROFILING_TOKEN as X-Profile-Token (or ?_profile_token=); with no token
+# configured the headers are ignored, since anyone could otherwise slow the
+# server down and fill its disk.
+#
+# The cProfile dump (<id>.prof, open with pstats or snakeviz) and the top
+# allocation sites (<id>.alloc.txt) are written to PROFILING_DIR, keeping the
+# newest PROFILING_MAX_FILES, and a short summary goes back in the
+# X-Profile-Summary header.
+#
+# Both profilers are process-wide, so only one request is profiled at a time;
+# a second one runs normally and gets `X-Profile-Summary: busy`. Streamed
+# responses are profiled up to the point the view returns.
+
+MODES = ('cpu', 'memory')
+TOP_FUNCTIONS = 3
+TOP_ALLOCATIONS = 25
+TRACEMALLOC_FRAMES = 10
+PROFILE_SUFFIXES = ('.prof', '.alloc.txt')
+
+_active = threading.Lock()
+
+def requested_modes(app):
+    value = request.headers.get('X-Profile') or request.args.get('_profile')
+    if not value:
+        return ()
+    token = app.config.get('PROFILING_TOKEN')
+    if not token:
+        return ()
+    supplied = request.headers.get('X-Profile-Token') or request.args.get('_profile_token')
+    # Constant-time, so response timing doesn't reveal how much of a guess matched
+    if not hmac.compare_digest((supplied or '').encode('utf-8'), token.encode('utf-8')):
+        return ()
+    modes = {mode.strip().lower() for mode in value.split(',')}
+    if 'all' in modes or 'true' in modes or '1' in modes:
+        return MODES
+    return tuple(mode for mode in MODES if mode in modes)
+
+def profile_dir(app):
+    directory = app.config.get('PROFILING_DIR') or os.path.join(tempfile.gettempdir(), 'payslip_profiles')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+def prune_profiles(directory, keep):
+    # Deletes all but the newest `keep` profile files
+    files = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.name.endswith(PROFILE_SUFFIXES):
+            files.append((entry.stat().st_mtime, entry.path))
+    files.sort(reverse=True)
+    for _, path in files[keep:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    return max(len(files) - keep, 0)
+
+def _location(func):
+    filename, line, name = func
+    return f"{os.path.basename(filename)}:{line}({name})" if line else name
+
+def _cpu_report(profiler, path):
+    profiler.dump_stats(path)
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    # Functions with the most time spent in their own body
+    ranked = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:TOP_FUNCTIONS]
+    top = ', '.join(f"{_location(func)} {own * 1000:.1f}ms" for func, (_, _, own, _, _) in ranked)
+    return {'cpu_top': top}
+
+def _memory_report(path):
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    ))
+    top = snapshot.statistics('lineno')[:TOP_ALLOCATIONS]
+    with open(path, 'w') as f:
+        f.write(f"peak traced memory: {peak / 1024:.1f} KiB\n\n")
+        for stat in top:
+            f.write(f"{stat}\n")
+    report = {'peak_kb': round(peak / 1024, 1)}
+    if top:
+        frame = top[0].traceback[0]
+        report['alloc_top'] = f"{os.path.basename(frame.filename)}:{frame.lineno} {top[0].size / 1024:.1f}KiB"
+    return report
+
+def _stop(session):
+    # Turns off whatever the request started; safe to call twice
+    if session.get('profiler') is not None:
+        session.pop('profiler').disable()
+    if session.pop('tracing', False):
+        tracemalloc.stop()
+    if session.pop('locked', False):
+        _active.release()
+
+def init_profiling(app):
+    # Hooks are only installed when profiling is on
+    if not app.config.get('PROFILING_ENABLED'):
+        return
+    if not app.config.get('PROFILING_TOKEN'):
+        print("Profiling is enabled but PROFILING_TOKEN is not set; X-Profile requests will be ignored")
+
+    @app.before_request
+    def _start_profiling():
+        modes = requested_modes(app)
+        if not modes:
+            return
+        if not _active.acquire(blocking=False):
+            g.profile = {'busy': True}
+            return
+
+        session = g.profile = {'id': uuid.uuid4().hex[:12], 'modes': modes, 'locked': True}
+        if 'memory' in modes:
+            if tracemalloc.is_tracing():
+                # Started outside this middleware (e.g. PYTHONTRACEMALLOC); leave it alone
+                session['modes'] = modes = tuple(mode for mode in modes if mode != 'memory')
+            else:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                session['tracing'] = True
+        if 'cpu' in modes:
+            session['profiler'] = cProfile.Profile()
+            session['profiler'].enable()
+        session['started'] = time.perf_counter()
+
+    @app.after_request
+    def _finish_profiling(response):
+        session = g.pop('profile', None)
+        if session is None:
+            return response
+        if session.get('busy'):
+            response.headers['X-Profile-Summary'] = 'busy'
+            return response
+
+        elapsed = time.perf_counter() - session['started']
+        profiler = session.get('profiler')
+        if profiler is not None:
+            profiler.disable()
+        try:
+            directory = profile_dir(app)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint or 'unknown'}-{session['id']}"
+            summary = {'id': name, 'wall_ms': round(elapsed * 1000, 1)}
+            if profiler is not None:
+                summary.update(_cpu_report(profiler, os.path.join(directory, name + '.prof')))
+            if session.get('tracing'):
+                summary.update(_memory_report(os.path.join(directory, name + '.alloc.txt')))
+            response.headers['X-Profile-Summary'] = '; '.join(f"{key}={value}" for key, value in summary.items())
+            prune_profiles(directory, app.config.get('PROFILING_MAX_FILES', 100))
+        except Exception as e:
+            print(f"Error writing request profile: {str(e)}")
+        finally:
+            _stop(session)
+        return response
+
+    @app.teardown_request
+    def _abandon_profiling(exc):
+        # A request that never reached after_request still releases the profilers
+        session = g.pop('profile', None)
+        if session is not None:
+            _stop(session)
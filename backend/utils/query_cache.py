@@ -0,0 +1,50 @@
+import threading
+import time
+
+class QueryCache:
+    # Short-lived results for read-mostly queries (dashboard lists and the
+    # like). Entries expire after `ttl` seconds; writers can drop them sooner
+    # with invalidate().
+    def __init__(self, ttl=5):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0}
+
+    def get_or_load(self, key, load):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._stats['hits'] += 1
+                return entry[1]
+            self._stats['misses'] += 1
+
+        # Loaded outside the lock; two concurrent misses both query, which is
+        # cheaper than serialising every reader behind a slow one
+        value = load()
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[key] = (now + self.ttl, value)
+        return value
+
+    def invalidate(self, *keys):
+        with self._lock:
+            if not keys:
+                self._entries.clear()
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), ttl_seconds=self.ttl)
+
+_cache_lock = threading.Lock()
+
+def get_query_cache(app):
+    # One cache per Flask app; QUERY_CACHE_SECONDS = 0 turns caching off
+    with _cache_lock:
+        cache = app.extensions.get('query_cache')
+        if cache is None:
+            cache = app.extensions['query_cache'] = QueryCache(app.config.get('QUERY_CACHE_SECONDS', 5))
+        return cache
@@ -0,0 +1,192 @@
+from collections import OrderedDict
+from flask import request, send_file, url_for
+from .metrics import increment, stage
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+
+# Bump when a generator's layout or number formatting changes so old renders
+# stop matching. 2: amounts rounded half up, with per-currency decimals.
+# 3: the /api/payslip/generate payslip shows the currency code instead of "$".
+TEMPLATE_VERSION = 3
+
+def render_cache_key(kind, data):
+    from .pdf_styles import styles_version
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    raw = f"{kind}:{TEMPLATE_VERSION}:{styles_version()}:{canonical}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+class RenderCache:
+    # Two-tier LRU of rendered PDFs keyed by content hash: a small in-memory tier
+    # in front of a larger on-disk one. Both tiers are bounded by total bytes.
+    def __init__(self, memory_bytes=64 * 1024 * 1024, disk_bytes=1024 * 1024 * 1024, directory=None):
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'payslip_render_cache')
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+        # Size of each file on disk, and their total, kept up to date by this
+        # process's reads and writes so a put doesn't list the directory. Seeded
+        # from the directory once; it is rescanned (picking up what other
+        # processes wrote or removed) only when the total goes over the limit.
+        self._disk = {}
+        self._disk_size = 0
+        self._disk_lock = threading.Lock()
+        with self._disk_lock:
+            self._scan_disk()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def _remember(self, key, pdf_bytes):
+        # Caller holds the lock
+        if key in self._memory or len(pdf_bytes) > self.memory_bytes:
+            return
+        self._memory[key] = pdf_bytes
+        self._memory_size += len(pdf_bytes)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def get(self, key):
+        with self._lock:
+            pdf_bytes = self._memory.get(key)
+            if pdf_bytes is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return pdf_bytes
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                pdf_bytes = f.read()
+            # Touch so disk eviction sees it as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.stats['misses'] += 1
+            return None
+
+        with self._lock:
+            self.stats['disk_hits'] += 1
+            self._remember(key, pdf_bytes)
+        with self._disk_lock:
+            self._index(key, len(pdf_bytes))
+        return pdf_bytes
+
+    def put(self, key, pdf_bytes):
+        with self._lock:
+            self._remember(key, pdf_bytes)
+
+        # Write then rename so readers never see a partial file
+        tmp_path = self._path(key) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(pdf_bytes)
+        os.replace(tmp_path, self._path(key))
+        with self._disk_lock:
+            self._index(key, len(pdf_bytes))
+            if self._disk_size > self.disk_bytes:
+                self._trim_disk()
+
+    def _index(self, key, size):
+        # Caller holds _disk_lock
+        self._disk_size += size - self._disk.pop(key, 0)
+        self._disk[key] = size
+
+    def _scan_disk(self):
+        # Caller holds _disk_lock. Rebuilds the index from the directory and
+        # returns its files oldest first (by mtime; reads touch their file).
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.pdf'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        entries.sort()
+
+        self._disk = {key: size for _, key, size in entries}
+        self._disk_size = sum(self._disk.values())
+        return entries
+
+    def _trim_disk(self):
+        # Caller holds _disk_lock
+        for _, key, size in self._scan_disk():
+            if self._disk_size <= self.disk_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            del self._disk[key]
+            self._disk_size -= size
+
+    def get_or_render(self, key, render):
+        pdf_bytes = self.get(key)
+        if pdf_bytes is None:
+            pdf_bytes = render()
+            self.put(key, pdf_bytes)
+        return pdf_bytes
+
+_cache_lock = threading.Lock()
+
+def get_render_cache(app):
+    # One cache per Flask app, sized from RENDER_CACHE_MEMORY_BYTES / RENDER_CACHE_DISK_BYTES / RENDER_CACHE_DIR
+    with _cache_lock:
+        cache = app.extensions.get('render_cache')
+        if cache is None:
+            cache = app.extensions['render_cache'] = RenderCache(
+                memory_bytes=app.config.get('RENDER_CACHE_MEMORY_BYTES', 64 * 1024 * 1024),
+                disk_bytes=app.config.get('RENDER_CACHE_DISK_BYTES', 1024 * 1024 * 1024),
+                directory=app.config.get('RENDER_CACHE_DIR')
+            )
+        return cache
+
+def _pdf_response(pdf_bytes, key, download_name):
+    response = send_file(
+        io.BytesIO(pdf_bytes),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=download_name
+    )
+    response.set_etag(key)
+    response.headers['Content-Location'] = url_for('documents.get_document', key=key)
+    return response.make_conditional(request)
+
+def cached_pdf_response(app, kind, data, render, download_name):
+    # render(data) returns a BytesIO, as the generators do
+    with stage(kind, 'cache_key'):
+        key = render_cache_key(kind, data)
+    if request.if_none_match.contains(key):
+        increment('payslip_render_cache_total', document=kind, result='not_modified')
+        return app.response_class(status=304, headers={'ETag': f'"{key}"'})
+
+    rendered = []
+    def render_bytes():
+        rendered.append(True)
+        return render(data).getvalue()
+
+    pdf_bytes = get_render_cache(app).get_or_render(key, render_bytes)
+    increment('payslip_render_cache_total', document=kind, result='miss' if rendered else 'hit')
+    with stage(kind, 'send'):
+        return _pdf_response(pdf_bytes, key, download_name)
+
+def cached_document_response(app, key):
+    # Conditional GET of a previously rendered document by its key
+    if request.if_none_match.contains(key):
+        return app.response_class(status=304, headers={'ETag': f'"{key}"'})
+
+    pdf_bytes = get_render_cache(app).get(key)
+    if pdf_bytes is None:
+        return None
+    return _pdf_response(pdf_bytes, key, f"{key[:12]}.pdf")
@@ -0,0 +1,87 @@
+from ..config.db import db
+from ..models.settings import Settings
+import threading
+import time
+
+# Branding a document takes from saved Settings. Saved names and logos replace
+# whatever the request sent; currency is only a default.
+PAYSLIP_BRANDING = ('company_name', 'company_logo')
+STATEMENT_BRANDING = ('bank_name', 'bank_logo')
+
+class SettingsCache:
+    # Read-through cache of the single-row configuration tables (Settings and
+    # the company / bank profiles), keyed by model. Every row carries a version
+    # stamp that SQLAlchemy bumps on each UPDATE. Once an entry is `ttl` seconds
+    # old it is revalidated by selecting just (id, version), so a save made by
+    # another worker process shows up without reloading the logos on every
+    # request. Saves in this process call invalidate() and show up at once.
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'revalidated': 0, 'loads': 0}
+
+    def get(self, model):
+        # Returns (stamp, row dict), or (stamp, None) when the table is empty
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(model)
+            if entry is not None and now - entry[0] < self.ttl:
+                self.stats['hits'] += 1
+                return entry[1], entry[2]
+
+        if entry is not None:
+            current = db.session.query(model.id, model.version).order_by(model.id).first()
+            if _stamp(model, current) == entry[1]:
+                with self._lock:
+                    self._entries[model] = (now, entry[1], entry[2])
+                    self.stats['revalidated'] += 1
+                return entry[1], entry[2]
+
+        row = model.query.order_by(model.id).first()
+        stamp, data = _stamp(model, row), (row.to_dict() if row else None)
+        with self._lock:
+            self._entries[model] = (now, stamp, data)
+            self.stats['loads'] += 1
+        return stamp, data
+
+    def invalidate(self, model=None):
+        with self._lock:
+            if model is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(model, None)
+
+def _stamp(model, row):
+    if row is None:
+        return f"{model.__tablename__}-none"
+    return f"{model.__tablename__}-{row.id}-{row.version}"
+
+_cache_lock = threading.Lock()
+
+def get_settings_cache(app):
+    # One cache per Flask app; SETTINGS_CACHE_SECONDS bounds how stale another
+    # worker's save can look
+    with _cache_lock:
+        cache = app.extensions.get('settings_cache')
+        if cache is None:
+            cache = app.extensions['settings_cache'] = SettingsCache(app.config.get('SETTINGS_CACHE_SECONDS', 30))
+        return cache
+
+def with_branding(app, data, fields):
+    # Copy of a render payload with the saved branding applied
+    _, settings = get_settings_cache(app).get(Settings)
+    branded = dict(data)
+    if settings:
+        for field in fields:
+            if settings.get(field):
+                branded[field] = settings[field]
+        if settings.get('currency'):
+            branded.setdefault('currency', settings['currency'])
+    return branded
+
+def payslip_branding(app, data):
+    return with_branding(app, data, PAYSLIP_BRANDING)
+
+def statement_branding(app, data):
+    return with_branding(app, data, STATEMENT_BRANDING)
@@ -0,0 +1,211 @@
+from datetime import datetime
+from functools import lru_cache
+from sqlalchemy import and_, bindparam, or_, select
+from .money import to_decimal, to_minor
+import csv
+import io
+import json
+
+REQUIRED_FIELDS = ['id', 'date']
+# Stop collecting row errors after this many; the import is rejected either way
+MAX_ERRORS = 100
+# Amounts are stored as Numeric(10, 2), so whole cents must stay below this
+MAX_MINOR = 10 ** 10
+
+@lru_cache(maxsize=4096)
+def parse_date(value):
+    # Statements repeat the same few hundred dates, so parse each one once
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def _amount(value):
+    # Raises ValueError (a row error) for NaN, Infinity, junk and anything the
+    # column cannot hold, rather than letting the database coerce or reject it
+    minor = to_minor(value)
+    if not -MAX_MINOR < minor < MAX_MINOR:
+        raise ValueError(f"amount {value!r} is out of range")
+    return to_decimal(minor)
+
+def normalize_row(row, account_name, account_number):
+    missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    try:
+        date = parse_date(str(row['date']))
+    except ValueError:
+        raise ValueError(f"invalid date {row['date']!r}")
+
+    return {
+        'transaction_id': str(row['id']),
+        'account_name': account_name,
+        'account_number': account_number,
+        'date': date,
+        'description': row.get('description'),
+        'money_in': _amount(row.get('moneyIn')),
+        'money_out': _amount(row.get('moneyOut')),
+        'balance': _amount(row.get('balance'))
+    }
+
+def iter_csv_rows(stream):
+    # Header row uses the JSON field names: id,date,description,moneyIn,moneyOut,balance
+    return csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8', newline=''))
+
+def iter_ndjson_rows(stream):
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+def iter_batches(rows, account_name, account_number, batch_size, errors):
+    batch = []
+    for line_number, row in enumerate(rows, 1):
+        try:
+            batch.append(normalize_row(row, account_name, account_number))
+        except ValueError as e:
+            if len(errors) < MAX_ERRORS:
+                errors.append({'row': line_number, 'error': str(e)})
+            continue
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def insert_transactions(session, table, rows, account_name, account_number, batch_size=1000):
+    # executemany per batch instead of one ORM object per row. The caller owns the
+    # transaction and must roll back if any errors are returned.
+    errors = []
+    inserted = 0
+    for batch in iter_batches(rows, account_name, account_number, batch_size, errors):
+        if errors:
+            # Keep validating the rest of the input but stop writing
+            continue
+        session.execute(table.insert(), batch)
+        inserted += len(batch)
+    return inserted, errors
+
+# Fields that make an incoming row "changed"; balance is recomputed, not compared
+COMPARED_FIELDS = ('account_name', 'date', 'description', 'money_in', 'money_out')
+
+def _earliest(current, candidate):
+    return candidate if current is None or candidate < current else current
+
+def upsert_transactions(session, table, rows, account_name, account_number, batch_size=1000):
+    # Insert new transaction_ids, update changed ones, leave the rest alone, then
+    # recompute running balances from the earliest date that changed.
+    errors = []
+    summary = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'duplicates': 0, 'rebalanced': 0}
+    first_changed = None
+
+    # The client's balance is stored too, but only matters when the changed row is
+    # the account's first; rebalance_from() rewrites every later one
+    written_fields = COMPARED_FIELDS + ('balance',)
+    update_stmt = table.update().where(table.c.id == bindparam('b_id')).values(
+        {field: bindparam(f'b_{field}') for field in written_fields}
+    )
+
+    for batch in iter_batches(rows, account_name, account_number, batch_size, errors):
+        if errors:
+            continue
+
+        # A transaction_id repeated within the batch would be inserted twice. The
+        # last occurrence wins, as it does when the repeat lands in a later batch
+        # (where it updates the row the earlier one wrote).
+        latest = {}
+        for row in batch:
+            latest.pop(row['transaction_id'], None)
+            latest[row['transaction_id']] = row
+        summary['duplicates'] += len(batch) - len(latest)
+        batch = list(latest.values())
+
+        ids = list(latest)
+        existing = {
+            row.transaction_id: row
+            for row in session.execute(select(table).where(table.c.transaction_id.in_(ids)))
+        }
+
+        inserts = []
+        updates = []
+        for row in batch:
+            current = existing.get(row['transaction_id'])
+            if current is None:
+                inserts.append(row)
+                first_changed = _earliest(first_changed, row['date'])
+            elif current.account_number != account_number:
+                if len(errors) < MAX_ERRORS:
+                    errors.append({
+                        'transaction_id': row['transaction_id'],
+                        'error': 'transaction_id belongs to another account'
+                    })
+            elif any(getattr(current, field) != row[field] for field in COMPARED_FIELDS):
+                params = {f'b_{field}': row[field] for field in written_fields}
+                params['b_id'] = current.id
+                updates.append(params)
+                first_changed = _earliest(first_changed, min(current.date, row['date']))
+            else:
+                summary['unchanged'] += 1
+
+        if errors:
+            continue
+        if inserts:
+            session.execute(table.insert(), inserts)
+            summary['inserted'] += len(inserts)
+        if updates:
+            session.execute(update_stmt, updates)
+            summary['updated'] += len(updates)
+
+    if not errors and first_changed is not None:
+        summary['rebalanced'] = rebalance_from(session, table, account_number, first_changed, batch_size)
+        summary['rebalanced_from'] = first_changed.isoformat()
+    return summary, errors
+
+def iter_account_pages(session, table, account_number, from_date, columns, batch_size=1000):
+    # Keyset pages of an account's rows in (date, id) order. Each page is a fresh
+    # query, so callers may update the rows they have been handed.
+    last = None
+    while True:
+        query = select(table.c.id, table.c.date, *columns).where(table.c.account_number == account_number)
+        if from_date is not None:
+            query = query.where(table.c.date >= from_date)
+        if last is not None:
+            query = query.where(or_(
+                table.c.date > last[0],
+                and_(table.c.date == last[0], table.c.id > last[1])
+            ))
+        page = session.execute(query.order_by(table.c.date, table.c.id).limit(batch_size)).all()
+        if not page:
+            return
+        yield page
+        last = (page[-1].date, page[-1].id)
+
+def rebalance_from(session, table, account_number, from_date, batch_size=1000):
+    # Walks the account from from_date onward, rewriting only balances that
+    # differ. Returns the number of rows rewritten.
+    previous = session.execute(
+        select(table.c.balance)
+        .where(table.c.account_number == account_number, table.c.date < from_date)
+        .order_by(table.c.date.desc(), table.c.id.desc())
+        .limit(1)
+    ).scalar()
+
+    balance = previous
+    rewritten = 0
+    update_stmt = table.update().where(table.c.id == bindparam('b_id')).values(balance=bindparam('b_balance'))
+    columns = (table.c.money_in, table.c.money_out, table.c.balance)
+
+    for page in iter_account_pages(session, table, account_number, from_date, columns, batch_size):
+        updates = []
+        for row in page:
+            movement = (row.money_in or 0) - (row.money_out or 0)
+            if balance is None:
+                # No history before the change: trust the earliest row's stored balance
+                balance = row.balance
+            else:
+                balance += movement
+            if row.balance != balance:
+                updates.append({'b_id': row.id, 'b_balance': balance})
+
+        if updates:
+            session.execute(update_stmt, updates)
+            rewritten += len(updates)
+
+    return rewritten
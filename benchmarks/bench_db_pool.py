@@ -0,0 +1,51 @@
+# Hammers /api/health/db from a pool of client threads and reports throughput
+# plus the connection pool's checkout wait and overflow counters. Defaults to a
+# throwaway SQLite file; point --url at a local MySQL to test the real driver.
+# Run from the repository root: python -m benchmarks.bench_db_pool
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+
+def main():
+    parser = argparse.ArgumentParser(description='DB connection pool benchmark')
+    parser.add_argument('--url', help='Database URL (default: temporary SQLite file)')
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--pool-size', type=int, default=Config.DB_POOL_SIZE)
+    parser.add_argument('--max-overflow', type=int, default=Config.DB_MAX_OVERFLOW)
+    parser.add_argument('--pool-timeout', type=int, default=Config.DB_POOL_TIMEOUT)
+    args = parser.parse_args()
+
+    url = args.url or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = url
+        DB_POOL_SIZE = args.pool_size
+        DB_MAX_OVERFLOW = args.max_overflow
+        DB_POOL_TIMEOUT = args.pool_timeout
+
+    from app import create_app
+    app = create_app(BenchConfig)
+
+    def hit(_):
+        # One test client per call; Flask's test client is not thread-safe
+        return app.test_client().get('/api/health/db').status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        codes = list(pool.map(hit, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    pool_info = app.test_client().get('/api/health/db').get_json()['pool']
+    print(f"{'threads':>8}{'requests':>10}{'errors':>8}{'seconds':>10}{'per sec':>10}")
+    print(f"{args.threads:>8}{args.requests:>10}{sum(code != 200 for code in codes):>8}"
+          f"{elapsed:>10.2f}{args.requests / elapsed:>10.0f}")
+    for key in ('pool_class', 'size', 'checked_out', 'overflow', 'connects', 'checkouts',
+                'timeouts', 'wait_avg_ms', 'wait_max_ms', 'invalidated'):
+        print(f"{key:<14}{pool_info.get(key)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# Float vs Decimal vs integer-minor-unit arithmetic for statement rows: parsing,
+# running balances and cell formatting, without the PDF layout around them.
+# Run from the repository root: python -m benchmarks.bench_money
+import argparse
+import gc
+import statistics
+import time
+from decimal import Decimal
+from backend.utils.statement_engine import statement_rows
+
+CURRENCY = 'KES'
+
+def synthetic_rows(count, kind):
+    # Amounts as they arrive: JSON numbers, CSV strings or DB Decimals
+    convert = {'float': float, 'str': lambda v: f"{v:.2f}", 'decimal': lambda v: Decimal(f"{v:.2f}")}[kind]
+    rows = []
+    for i in range(1, count + 1):
+        money_in = 250.1 + i % 7 if i % 3 else 0
+        money_out = 0 if i % 3 else 600.35
+        rows.append({
+            'date': '2024-%02d-%02d' % (i % 12 + 1, i % 28 + 1),
+            'id': 'TX%07d' % i,
+            'description': 'Card payment' if money_out else 'Transfer in',
+            'moneyIn': convert(money_in),
+            'moneyOut': convert(money_out)
+        })
+    return rows
+
+def float_rows(transactions, opening):
+    # The original per-row loop: float() every amount and accumulate in binary floating point
+    rows = []
+    balance = float(opening)
+    for idx, t in enumerate(transactions, 1):
+        money_in = float(t.get('moneyIn', 0) or 0)
+        money_out = float(t.get('moneyOut', 0) or 0)
+        balance += money_in - money_out
+        rows.append([
+            str(idx), t['date'], t['id'], t['description'],
+            f"{CURRENCY} {money_in:,.2f}" if money_in > 0 else '',
+            f"{CURRENCY} {money_out:,.2f}" if money_out > 0 else '',
+            f"{CURRENCY} {balance:,.2f}"
+        ])
+    return rows, balance
+
+def decimal_rows(transactions, opening):
+    # Exact, but Decimal objects all the way through
+    rows = []
+    balance = Decimal(str(opening))
+    for idx, t in enumerate(transactions, 1):
+        money_in = Decimal(str(t.get('moneyIn', 0) or 0))
+        money_out = Decimal(str(t.get('moneyOut', 0) or 0))
+        balance += money_in - money_out
+        rows.append([
+            str(idx), t['date'], t['id'], t['description'],
+            f"{CURRENCY} {money_in:,.2f}" if money_in > 0 else '',
+            f"{CURRENCY} {money_out:,.2f}" if money_out > 0 else '',
+            f"{CURRENCY} {balance:,.2f}"
+        ])
+    return rows, balance
+
+def minor_rows(transactions, opening):
+    # What the PDF renderers run: exact minor units, cells formatted from integers
+    return statement_rows(transactions, CURRENCY, opening)
+
+def run_interleaved(repeat, paths, transactions):
+    # Each run times every path once, in turn, so machine noise is spread evenly
+    # across them. Garbage from the previous path is collected first, so it
+    # isn't billed to this one.
+    times = {name: [] for name, _, _ in paths}
+    results = {}
+    for _ in range(repeat):
+        for name, func, opening in paths:
+            gc.collect()
+            started = time.perf_counter()
+            results[name] = func(transactions, opening)
+            times[name].append(time.perf_counter() - started)
+    return times, results
+
+def main():
+    parser = argparse.ArgumentParser(description='Statement money arithmetic benchmark')
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=15)
+    args = parser.parse_args()
+
+    paths = (('float', float_rows, 0.0), ('decimal', decimal_rows, 0), ('minor', minor_rows, 0))
+    print(f"{'input':<10}{'path':<10}{'median s':>10}{'min s':>10}{'rows/sec':>12}{'vs float':>10}  closing balance")
+    for kind in ('float', 'str', 'decimal'):
+        transactions = synthetic_rows(args.rows, kind)
+        times, results = run_interleaved(args.repeat, paths, transactions)
+        baseline = statistics.median(times['float'])
+        for name, _, _ in paths:
+            median = statistics.median(times[name])
+            closing = results[name][1]
+            if name == 'minor':
+                closing = f"{closing} (minor units)"
+            print(f"{kind:<10}{name:<10}{median:>10.3f}{min(times[name]):>10.3f}{args.rows / median:>12.0f}"
+                  f"{median / baseline:>9.2f}x  {closing!r}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# Full SimpleDocTemplate payslip build vs the cached page template with a
+# per-employee field overlay (backend/utils/payslip_template.py).
+# Run from the repository root: python -m benchmarks.bench_payslip_template
+import argparse
+import base64
+import io
+import time
+from PIL import Image
+from backend.utils.payslip_generator import generate_payslip_pdf
+from backend.utils.payslip_template import clear_payslip_templates, generate_payslip_pdf_from_template
+
+COMPANY = {
+    'company_name': 'Acme Ltd',
+    'month': '2024-01',
+    'currency': 'KES',
+    'generated_at': '2024-01-31T17:00:00'
+}
+
+def synthetic_logo():
+    buffer = io.BytesIO()
+    Image.new('RGB', (600, 300), '#1a237e').save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+def employees(count, company):
+    for i in range(1, count + 1):
+        yield dict(
+            company,
+            employeeName=f"Employee {i}",
+            employeeId='EMP%05d' % i,
+            position='Engineer',
+            basicSalary=50000 + i * 10,
+            allowances=5000,
+            deductions=3500.5
+        )
+
+def measure(render, payloads):
+    started = time.perf_counter()
+    size = sum(len(render(data).getvalue()) for data in payloads)
+    return time.perf_counter() - started, size
+
+def main():
+    parser = argparse.ArgumentParser(description='Payslip template overlay benchmark')
+    parser.add_argument('--count', type=int, default=500)
+    parser.add_argument('--logo', action='store_true', help='Include a company logo')
+    args = parser.parse_args()
+
+    company = dict(COMPANY, company_logo=synthetic_logo()) if args.logo else COMPANY
+    payloads = list(employees(args.count, company))
+
+    # The first template render pays for the layout; report it separately
+    clear_payslip_templates()
+    started = time.perf_counter()
+    generate_payslip_pdf_from_template(payloads[0])
+    layout = time.perf_counter() - started
+
+    print(f"{'renderer':<10}{'payslips':>10}{'seconds':>10}{'ms each':>10}{'per sec':>10}{'KB each':>10}")
+    results = {}
+    for name, render in (('full', generate_payslip_pdf), ('template', generate_payslip_pdf_from_template)):
+        elapsed, size = measure(render, payloads)
+        results[name] = elapsed
+        print(f"{name:<10}{args.count:>10}{elapsed:>10.2f}{elapsed / args.count * 1000:>10.2f}"
+              f"{args.count / elapsed:>10.0f}{size / args.count / 1024:>10.1f}")
+    print(f"template layout (once per company): {layout * 1000:.1f} ms")
+    print(f"speedup: {results['full'] / results['template']:.1f}x")
+
+if __name__ == '__main__':
+    main()
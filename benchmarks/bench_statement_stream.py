@@ -0,0 +1,78 @@
+# Single-Table vs page-at-a-time bank statement rendering at growing row counts.
+# Run from the repository root: python -m benchmarks.bench_statement_stream
+import argparse
+import time
+import tracemalloc
+from backend.utils import bank_statement_generator
+from backend.utils.bank_statement_generator import generate_bank_statement_pdf_stream
+
+STATEMENT = {
+    'bank_name': 'Acme Bank',
+    'accountName': 'Jane Doe',
+    'accountNumber': '0123456789',
+    'fromDate': '2024-01-01',
+    'toDate': '2024-12-31',
+    'initialBalance': 0,
+    'currency': 'KES'
+}
+
+def synthetic_rows(count):
+    balance = 0
+    for i in range(1, count + 1):
+        money_in = 250 if i % 3 else 0
+        money_out = 0 if i % 3 else 600
+        balance += money_in - money_out
+        yield {
+            'date': '2024-%02d-%02d' % (i % 12 + 1, i % 28 + 1),
+            'id': 'TX%07d' % i,
+            'description': 'Card payment' if money_out else 'Transfer in',
+            'moneyIn': money_in,
+            'moneyOut': money_out,
+            'balance': balance
+        }
+
+def render_table(count):
+    # Force the original single-Table path regardless of STREAM_THRESHOLD
+    threshold = bank_statement_generator.STREAM_THRESHOLD
+    bank_statement_generator.STREAM_THRESHOLD = float('inf')
+    try:
+        data = dict(STATEMENT, transactions=list(synthetic_rows(count)))
+        return bank_statement_generator.generate_bank_statement_pdf(data)
+    finally:
+        bank_statement_generator.STREAM_THRESHOLD = threshold
+
+def render_stream(count):
+    return generate_bank_statement_pdf_stream(STATEMENT, synthetic_rows(count))
+
+def measure(render, count, memory):
+    started = time.perf_counter()
+    size = len(render(count).getvalue())
+    elapsed = time.perf_counter() - started
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        render(count)
+        peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+    return elapsed, size, peak
+
+def main():
+    parser = argparse.ArgumentParser(description='Bank statement renderer benchmark')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--table-max', type=int, default=10000,
+                        help='Skip the single-Table renderer above this many rows (it is superlinear)')
+    parser.add_argument('--memory', action='store_true', help='Also record peak traced memory (slow)')
+    args = parser.parse_args()
+
+    print(f"{'renderer':<10}{'rows':>10}{'seconds':>10}{'rows/sec':>12}{'pdf KB':>10}{'peak MB':>10}")
+    for count in args.rows:
+        for name, render in (('table', render_table), ('stream', render_stream)):
+            if name == 'table' and count > args.table_max:
+                continue
+            elapsed, size, peak = measure(render, count, args.memory)
+            peak_text = f"{peak:.1f}" if peak is not None else '-'
+            print(f"{name:<10}{count:>10}{elapsed:>10.2f}{count / elapsed:>12.0f}{size / 1024:>10.0f}{peak_text:>10}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# Per-PDF time saved by the style registry in backend/utils/pdf_styles.py.
+# Run from the repository root: python -m benchmarks.bench_styles
+import argparse
+import time
+from backend.utils import pdf_styles
+from backend.utils.payslip_generator import generate_payslip_pdf
+from backend.utils.bank_statement_generator import generate_bank_statement_pdf
+
+PAYSLIP = {
+    'company_name': 'Acme Ltd',
+    'month': '2024-01',
+    'employeeName': 'Jane Doe',
+    'employeeId': 'EMP001',
+    'position': 'Engineer',
+    'basicSalary': 85000.0,
+    'allowances': 12000.0,
+    'deductions': 9500.0,
+    'currency': 'KES'
+}
+
+STATEMENT = {
+    'bank_name': 'Acme Bank',
+    'accountName': 'Jane Doe',
+    'accountNumber': '0123456789',
+    'fromDate': '2024-01-01',
+    'toDate': '2024-01-31',
+    'initialBalance': 1000,
+    'currency': 'KES',
+    'transactions': [
+        {'date': '2024-01-%02d' % (i % 28 + 1), 'id': 'TX%05d' % i, 'description': 'Payment',
+         'moneyIn': 100, 'moneyOut': 0, 'balance': 1000 + 100 * i}
+        for i in range(1, 11)
+    ]
+}
+
+def time_per_call(fn, iterations, before=None):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        if before:
+            before()
+        fn()
+    return (time.perf_counter() - started) / iterations * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='Style registry micro-benchmark')
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    cases = [
+        ('payslip styles', lambda: (pdf_styles.get_payslip_styles(), pdf_styles.get_payslip_table_styles())),
+        ('statement styles', lambda: (pdf_styles.get_bank_statement_styles(), pdf_styles.get_bank_statement_table_styles())),
+        ('payslip pdf', lambda: generate_payslip_pdf(PAYSLIP)),
+        ('statement pdf', lambda: generate_bank_statement_pdf(STATEMENT)),
+    ]
+
+    print(f"{'case':<20}{'rebuilt ms':>12}{'cached ms':>12}{'saved ms':>12}")
+    for name, fn in cases:
+        fn()
+        rebuilt = time_per_call(fn, args.iterations, before=pdf_styles.invalidate_styles)
+        fn()
+        cached = time_per_call(fn, args.iterations)
+        print(f"{name:<20}{rebuilt:>12.3f}{cached:>12.3f}{rebuilt - cached:>12.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,304 @@
+# Benchmark suite: payslip renderers, bank statements at growing sizes, the
+# transaction endpoints and the employee listing, each on synthetic fixtures.
+# Every case runs in a fresh child process so its peak RSS is its own. Results
+# can be saved as JSON and compared against an earlier run; the exit status is
+# 1 when any case's median latency regressed past the threshold.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_suite --save results.json
+#   python -m benchmarks.bench_suite --compare results.json --threshold 0.2
+#   python -m benchmarks.bench_suite --cases 'statement_*' --statement-sizes 10 1000
+import argparse
+import fnmatch
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from benchmarks.bench_payslip_template import COMPANY, employees as payslip_payloads, synthetic_logo
+from benchmarks.bench_statement_stream import STATEMENT, synthetic_rows
+
+DEFAULT_STATEMENT_SIZES = [10, 1000, 10000, 100000]
+DEFAULT_TRANSACTION_SIZES = [1000, 10000]
+DEFAULT_HEADCOUNTS = [1000, 10000, 100000]
+
+def iterations_for(rows, most=50):
+    # Enough calls for a stable p50 on small inputs, one or two on huge ones
+    return max(1, min(most, 20000 // max(rows, 1)))
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+def timed(call, iterations, warmup=1):
+    for _ in range(warmup):
+        call()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+# Fixtures --------------------------------------------------------------------
+
+def bench_config(directory):
+    from config import Config
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(directory, 'bench.db')
+        RENDER_CACHE_DIR = os.path.join(directory, 'render_cache')
+        JOB_RESULTS_DIR = os.path.join(directory, 'jobs')
+        METRICS_ENABLED = False
+        QUERY_CACHE_SECONDS = 0
+
+    return BenchConfig
+
+def bench_app():
+    from app import create_app
+    from models import db
+
+    app = create_app(bench_config(tempfile.mkdtemp(prefix='payslip_bench_')))
+    with app.app_context():
+        db.create_all()
+    return app
+
+def seed_employees(app, count):
+    from models import db, Employee
+
+    departments = ('Engineering', 'Finance', 'Operations', 'Sales')
+    rows = [{
+        'first_name': 'First%06d' % i,
+        'last_name': 'Last%06d' % (i * 7919 % count),
+        'email': 'employee%06d@example.com' % i,
+        'phone': '0700%06d' % i,
+        'position': 'Engineer' if i % 2 else 'Analyst',
+        'department': departments[i % len(departments)],
+        'hire_date': datetime(2020, 1, 1).date()
+    } for i in range(count)]
+    with app.app_context():
+        for start in range(0, count, 5000):
+            db.session.execute(Employee.__table__.insert(), rows[start:start + 5000])
+        db.session.commit()
+
+# Cases -----------------------------------------------------------------------
+# Each run() returns (samples, units per call); units are rows or documents.
+
+def case_payslip(variant, logo):
+    def run():
+        from app import generate_payslip_pdf as canvas_pdf
+        from backend.utils.payslip_generator import generate_payslip_pdf as flowable_pdf
+        from backend.utils.payslip_template import generate_payslip_pdf_from_template as template_pdf
+
+        render = {'canvas': canvas_pdf, 'flowables': flowable_pdf, 'template': template_pdf}[variant]
+        company = dict(COMPANY, company_logo=synthetic_logo()) if logo else COMPANY
+        payloads = list(payslip_payloads(200, company))
+        position = iter(range(10 ** 9))
+        samples = timed(lambda: render(payloads[next(position) % len(payloads)]), 200)
+        return samples, 1
+    return run
+
+def case_payslips_combined(count):
+    def run():
+        from backend.utils.payslip_template import generate_combined_payslips_pdf
+
+        payloads = list(payslip_payloads(count, dict(COMPANY, company_logo=synthetic_logo())))
+        return timed(lambda: generate_combined_payslips_pdf(payloads), iterations_for(count, most=20)), count
+    return run
+
+def case_statement(rows):
+    def run():
+        from backend.utils.bank_statement_generator import generate_bank_statement_pdf
+
+        data = dict(STATEMENT, transactions=list(synthetic_rows(rows)))
+        samples = timed(lambda: generate_bank_statement_pdf(data), iterations_for(rows), warmup=1 if rows <= 10000 else 0)
+        return samples, rows
+    return run
+
+def case_transactions_save(rows):
+    def run():
+        app = bench_app()
+        client = app.test_client()
+        payload = {'account_name': 'Bench', 'account_number': '0001', 'transactions': list(synthetic_rows(rows))}
+
+        def save():
+            response = client.post('/api/transactions', json=payload)
+            assert response.status_code == 200, response.get_json()
+
+        return timed(save, iterations_for(rows, most=10)), rows
+    return run
+
+def case_transactions_get(rows, query):
+    def run():
+        app = bench_app()
+        client = app.test_client()
+        payload = {'account_name': 'Bench', 'account_number': '0001', 'transactions': list(synthetic_rows(rows))}
+        assert client.post('/api/transactions', json=payload).status_code == 200
+
+        def get():
+            response = client.get(f'/api/transactions?account_number=0001{query}')
+            assert response.status_code == 200
+
+        returned = rows if not query else min(rows, 100)
+        return timed(get, iterations_for(returned)), returned
+    return run
+
+def case_employees(headcount, query):
+    def run():
+        app = bench_app()
+        seed_employees(app, headcount)
+        client = app.test_client()
+
+        def get():
+            response = client.get(f'/api/employees?{query}')
+            assert response.status_code == 200, response.get_json()
+
+        return timed(get, 50), 1
+    return run
+
+EMPLOYEE_QUERIES = {
+    'first_page': 'limit=50',
+    'by_name': 'limit=50&sort=last_name',
+    'search': 'limit=50&q=Last0001',
+    'department': 'limit=50&department=Finance&fields=id,first_name,last_name'
+}
+
+def build_cases(args):
+    cases = {}
+    for variant in ('canvas', 'flowables', 'template'):
+        cases[f'payslip_{variant}'] = case_payslip(variant, False)
+        cases[f'payslip_{variant}_logo'] = case_payslip(variant, True)
+    cases['payslips_combined_200_logo'] = case_payslips_combined(200)
+    for rows in args.statement_sizes:
+        cases[f'statement_{rows}'] = case_statement(rows)
+    for rows in args.transaction_sizes:
+        cases[f'transactions_save_{rows}'] = case_transactions_save(rows)
+        cases[f'transactions_get_all_{rows}'] = case_transactions_get(rows, '')
+        cases[f'transactions_get_page_{rows}'] = case_transactions_get(rows, '&limit=100')
+    for headcount in args.headcounts:
+        for name, query in EMPLOYEE_QUERIES.items():
+            cases[f'employees_{name}_{headcount}'] = case_employees(headcount, query)
+    return cases
+
+# Running and reporting -------------------------------------------------------
+
+def _child(run, connection):
+    # Silence the app's startup banner and per-request debug prints
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        samples, units = run()
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        connection.send({'samples': samples, 'units': units, 'peak_rss_mb': peak_kb / 1024})
+    except Exception as e:
+        connection.send({'error': f'{type(e).__name__}: {e}'})
+    finally:
+        connection.close()
+
+def run_case(run):
+    context = multiprocessing.get_context('fork')
+    parent, child = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(run, child))
+    process.start()
+    child.close()
+    try:
+        outcome = parent.recv()
+    except EOFError:
+        outcome = {'error': f'child exited with status {process.exitcode}'}
+    process.join()
+    if 'error' in outcome:
+        return outcome
+
+    samples = outcome['samples']
+    total = sum(samples)
+    return {
+        'iterations': len(samples),
+        'p50_ms': round(percentile(samples, 0.5) * 1000, 3),
+        'p99_ms': round(percentile(samples, 0.99) * 1000, 3),
+        'mean_ms': round(total / len(samples) * 1000, 3),
+        'throughput_per_sec': round(len(samples) * outcome['units'] / total, 2) if total else 0.0,
+        'units_per_call': outcome['units'],
+        'peak_rss_mb': round(outcome['peak_rss_mb'], 1)
+    }
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+def compare(results, baseline, threshold):
+    # A case regresses when its p50 grew by more than threshold (0.2 = 20%)
+    regressions = []
+    print(f"\n{'case':<36}{'base p50':>12}{'p50':>12}{'change':>10}")
+    for name, result in results.items():
+        before = baseline.get('results', {}).get(name)
+        if not before or 'p50_ms' not in before or 'p50_ms' not in result:
+            continue
+        change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] if before['p50_ms'] else 0.0
+        flag = '  REGRESSED' if change > threshold else ''
+        print(f"{name:<36}{before['p50_ms']:>12.3f}{result['p50_ms']:>12.3f}{change:>+10.1%}{flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='PDF generation and API benchmark suite')
+    parser.add_argument('--cases', nargs='+', default=['*'], help='Glob patterns of case names to run')
+    parser.add_argument('--list', action='store_true', help='List case names and exit')
+    parser.add_argument('--statement-sizes', type=int, nargs='+', default=DEFAULT_STATEMENT_SIZES)
+    parser.add_argument('--transaction-sizes', type=int, nargs='+', default=DEFAULT_TRANSACTION_SIZES)
+    parser.add_argument('--headcounts', type=int, nargs='+', default=DEFAULT_HEADCOUNTS)
+    parser.add_argument('--save', help='Write results to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON from an earlier --save')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed p50 slowdown before a case counts as regressed (default 0.2 = 20%%)')
+    args = parser.parse_args()
+
+    cases = build_cases(args)
+    selected = [name for name in cases if any(fnmatch.fnmatch(name, pattern) for pattern in args.cases)]
+    if args.list:
+        print('\n'.join(selected))
+        return 0
+
+    print(f"{'case':<36}{'calls':>7}{'p50 ms':>11}{'p99 ms':>11}{'per sec':>12}{'peak MB':>10}")
+    results = {}
+    for name in selected:
+        result = run_case(cases[name])
+        results[name] = result
+        if 'error' in result:
+            print(f"{name:<36}  failed: {result['error']}")
+            continue
+        print(f"{name:<36}{result['iterations']:>7}{result['p50_ms']:>11.2f}{result['p99_ms']:>11.2f}"
+              f"{result['throughput_per_sec']:>12.1f}{result['peak_rss_mb']:>10.1f}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+        print(f"\nSaved {len(results)} results to {args.save}")
+
+    failed = [name for name, result in results.items() if 'error' in result]
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed more than {args.threshold:.0%}: {', '.join(regressions)}")
+    return 1 if regressions or failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,6 +8,66 @@ class Config:
     # Flask
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
     
-    # Database
-    SQLALCHEMY_DATABASE_URI = 'mysql+mysqlconnector://root:@localhost/payslip_db'
+    # Database (DATABASE_URL wins; otherwise the DB_* parts from .env)
+    SQLALCHEMY_DATABASE_URI = os.getenv(
+        'DATABASE_URL',
+        'mysql+mysqlconnector://{user}:{password}@{host}/{name}'.format(
+            user=os.getenv('DB_USER', 'root'),
+            password=os.getenv('DB_PASSWORD', ''),
+            host=os.getenv('DB_HOST', 'localhost'),
+            name=os.getenv('DB_NAME', 'payslip_db')
+        )
+    )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection pool; see backend/config/db.py for how these map to the engine
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 10))
+    # Recycle before MySQL's wait_timeout drops idle connections under us
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+    DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', 10))
+
+    # Bulk payroll runs
+    PAYROLL_WORKERS = int(os.getenv('PAYROLL_WORKERS', os.cpu_count() or 1))
+
+    # Rows per executemany when importing transactions
+    TRANSACTION_BATCH_SIZE = int(os.getenv('TRANSACTION_BATCH_SIZE', 1000))
+
+    # Rows validated and inserted together by /api/employees/import
+    EMPLOYEE_IMPORT_BATCH_SIZE = int(os.getenv('EMPLOYEE_IMPORT_BATCH_SIZE', 1000))
+
+    # Background PDF jobs (/api/jobs)
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', os.cpu_count() or 1))
+    JOB_RESULTS_DIR = os.getenv('JOB_RESULTS_DIR')
+    JOB_RETENTION_SECONDS = int(os.getenv('JOB_RETENTION_SECONDS', 3600))
+
+    # Batch statements for every account (/api/transactions/statements/batch, flask statements-batch)
+    STATEMENT_BATCH_WORKERS = int(os.getenv('STATEMENT_BATCH_WORKERS', os.cpu_count() or 1))
+    STATEMENT_BATCH_DIR = os.getenv('STATEMENT_BATCH_DIR')
+    # Batches (statements and ZIP) untouched this long are removed when the next one starts
+    STATEMENT_BATCH_RETENTION_SECONDS = int(os.getenv('STATEMENT_BATCH_RETENTION_SECONDS', 86400))
+
+    # Rendered PDF cache (memory tier in front of a disk tier)
+    RENDER_CACHE_DIR = os.getenv('RENDER_CACHE_DIR')
+    RENDER_CACHE_MEMORY_BYTES = int(os.getenv('RENDER_CACHE_MEMORY_BYTES', 64 * 1024 * 1024))
+    RENDER_CACHE_DISK_BYTES = int(os.getenv('RENDER_CACHE_DISK_BYTES', 1024 * 1024 * 1024))
+
+    # Dashboard lists (/api/payslips/recent, /api/statements/recent) are cached this long
+    QUERY_CACHE_SECONDS = int(os.getenv('QUERY_CACHE_SECONDS', 5))
+
+    # Settings and company / bank profiles: how long before a cached row is
+    # revalidated against its version stamp (saves in this process apply at once)
+    SETTINGS_CACHE_SECONDS = int(os.getenv('SETTINGS_CACHE_SECONDS', 30))
+
+    # Per-stage render timings, PDF sizes and request / DB latency at GET /metrics
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+
+    # Per-request cProfile / tracemalloc via the X-Profile header (or ?_profile=).
+    # Requests must also carry PROFILING_TOKEN; without one set, nothing is profiled.
+    # Only the newest PROFILING_MAX_FILES dumps are kept in PROFILING_DIR.
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    PROFILING_TOKEN = os.getenv('PROFILING_TOKEN')
+    PROFILING_DIR = os.getenv('PROFILING_DIR')
+    PROFILING_MAX_FILES = int(os.getenv('PROFILING_MAX_FILES', 100))
@@ -1,8 +1,8 @@
-from app import db, app
+from app import db, create_app
 from models import User, CompanyProfile, Employee, BankStatement, Payslip
 
 def init_db():
-    with app.app_context():
+    with create_app().app_context():
         # Create all tables
         db.create_all()
         print("Database tables created successfully")
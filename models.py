@@ -1,8 +1,6 @@
-from flask_sqlalchemy import SQLAlchemy
+from backend.config.db import db
 from datetime import datetime
 
-db = SQLAlchemy()
-
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -15,18 +13,70 @@ class User(db.Model):
 
 class CompanyProfile(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # The profile screen saves without an owning user
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     name = db.Column(db.String(100), nullable=False)
     address = db.Column(db.String(200), nullable=False)
+    phone = db.Column(db.String(30))
+    email = db.Column(db.String(120))
+    website = db.Column(db.String(200))
+    logo_url = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped on every UPDATE; the settings cache revalidates on it
+    version = db.Column(db.Integer, nullable=False)
+
+    __mapper_args__ = {'version_id_col': version}
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'address': self.address,
+            'phone': self.phone,
+            'email': self.email,
+            'website': self.website or '',
+            'logo_url': self.logo_url or ''
+        }
+
+class BankProfile(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    bank_name = db.Column(db.String(100), nullable=False)
+    account_number = db.Column(db.String(50), nullable=False)
+    branch_code = db.Column(db.String(20))
+    swift_code = db.Column(db.String(20))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False)
+
+    __mapper_args__ = {'version_id_col': version}
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'bank_name': self.bank_name,
+            'account_number': self.account_number,
+            'branch_code': self.branch_code,
+            'swift_code': self.swift_code
+        }
 
 class Employee(db.Model):
+    __table_args__ = (
+        # (column, id) pairs serve the listing's filters, name prefix search
+        # and keyset sort orders; email is covered by its unique index
+        db.Index('ix_employee_last_name_id', 'last_name', 'id'),
+        db.Index('ix_employee_first_name_id', 'first_name', 'id'),
+        db.Index('ix_employee_position_id', 'position', 'id'),
+        db.Index('ix_employee_department_id', 'department', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # Employees created or imported through the API have no owning user
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
+    phone = db.Column(db.String(30))
     position = db.Column(db.String(50), nullable=False)
+    department = db.Column(db.String(50))
+    hire_date = db.Column(db.Date)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     payslips = db.relationship('Payslip', backref='employee', lazy=True)
 
@@ -41,4 +91,5 @@ class Payslip(db.Model):
     basic_salary = db.Column(db.Float, nullable=False)
     allowances = db.Column(db.Float, nullable=False)
     deductions = db.Column(db.Float, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Indexed for the newest-first dashboard list
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
@@ -152,14 +152,27 @@ const Employees = () => {
   const [error, setError] = useState(null);
   const [dialogOpen, setDialogOpen] = useState(false);
   const [selectedEmployee, setSelectedEmployee] = useState(null);
+  const [search, setSearch] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
 
   useEffect(() => {
-    fetchEmployees();
-  }, []);
+    // Debounce typing so each keystroke doesn't hit the API
+    const timer = setTimeout(() => fetchEmployees(), 300);
+    return () => clearTimeout(timer);
+  }, [search]);
 
-  const fetchEmployees = async () => {
+  // The API returns one page at a time; "Load more" appends the next page
+  const fetchEmployees = async (cursor = null) => {
     try {
-      const response = await fetch('http://localhost:5000/api/employees', {
+      const params = new URLSearchParams({ limit: 50, sort: 'last_name' });
+      if (search) {
+        params.set('q', search);
+      }
+      if (cursor) {
+        params.set('cursor', cursor);
+      }
+
+      const response = await fetch(`http://localhost:5000/api/employees?${params}`, {
         headers: {
           'Authorization': `Bearer ${localStorage.getItem('token')}`
         }
@@ -170,7 +183,8 @@ const Employees = () => {
       }
 
       const data = await response.json();
-      setEmployees(data.employees);
+      setEmployees(cursor ? (current) => [...current, ...data.employees] : data.employees);
+      setNextCursor(data.next_cursor);
     } catch (error) {
       console.error('Error fetching employees:', error);
       setError(error.message);
@@ -263,6 +277,14 @@ const Employees = () => {
           </Alert>
         )}
 
+        <TextField
+          fullWidth
+          label="Search by name or email"
+          value={search}
+          onChange={(e) => setSearch(e.target.value)}
+          sx={{ mb: 3 }}
+        />
+
         <TableContainer>
           <Table>
             <TableHead>
@@ -318,6 +340,11 @@ const Employees = () => {
             </TableBody>
           </Table>
         </TableContainer>
+        {nextCursor && (
+          <Box display="flex" justifyContent="center" mt={2}>
+            <Button onClick={() => fetchEmployees(nextCursor)}>Load more</Button>
+          </Box>
+        )}
       </Paper>
 
       <EmployeeForm
@@ -0,0 +1,5 @@
+# Module-level app for servers that import one (`gunicorn wsgi:app`, mod_wsgi);
+# `gunicorn 'app:create_app()'` builds the same app without this module.
+from app import create_app
+
+app = create_app()